@@ -1,17 +1,98 @@
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
 from controller import (
     auth_router,
     user_router,
     friendship_router,
     event_router,
-    expense_router
+    expense_router,
+    internal_router
 )
 from auth.middleware import JWTAuthMiddleware
+from auth.kdf_pool import kdf_pool
+from middleware.compression import CompressionMiddleware
+from middleware.idempotency import IdempotencyMiddleware, idempotency_store
+from middleware.metrics import MetricsMiddleware
+from metrics.exposition import METRICS_MULTIPROC_DIR, publish_snapshot, worker_snapshot
+from middleware.profiling import PROFILING_SECRET, ProfilingMiddleware
+from database.config import SessionLocal
+from service.token_service import TokenService
+from service.user_service import UserService
+
+REVOCATION_RELOAD_SECONDS = float(os.getenv("REVOCATION_RELOAD_SECONDS", "60"))
+RESET_TOKEN_SWEEP_SECONDS = float(os.getenv("RESET_TOKEN_SWEEP_SECONDS", "3600"))
+IDEMPOTENCY_SWEEP_SECONDS = float(os.getenv("IDEMPOTENCY_SWEEP_SECONDS", "3600"))
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") != "0"
+METRICS_FLUSH_SECONDS = float(os.getenv("METRICS_FLUSH_SECONDS", "5"))
+
+logger = logging.getLogger(__name__)
+
+
+def load_revocation_filter():
+    db = SessionLocal()
+    try:
+        TokenService(db).load_revocation_filter()
+    finally:
+        db.close()
+
+
+def purge_expired_reset_tokens():
+    db = SessionLocal()
+    try:
+        UserService(db).purge_expired_reset_tokens()
+    finally:
+        db.close()
+
+
+def purge_expired_idempotency_keys():
+    idempotency_store.purge_expired()
+
+
+async def run_periodically(interval: float, job):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await run_in_threadpool(job)
+        except Exception:
+            logger.exception("Periodic job %s failed", job.__name__)
+
+
+async def publish_metrics_periodically(interval: float):
+    # The snapshot is taken on the event loop, which owns the thread limiter state; the file I/O is not.
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await run_in_threadpool(publish_snapshot, worker_snapshot())
+        except OSError:
+            logger.exception("Failed to publish metrics snapshot")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await run_in_threadpool(load_revocation_filter)
+    await run_in_threadpool(kdf_pool.warm_up)
+    tasks = [
+        asyncio.create_task(run_periodically(REVOCATION_RELOAD_SECONDS, load_revocation_filter)),
+        asyncio.create_task(run_periodically(RESET_TOKEN_SWEEP_SECONDS, purge_expired_reset_tokens)),
+        asyncio.create_task(run_periodically(IDEMPOTENCY_SWEEP_SECONDS, purge_expired_idempotency_keys)),
+    ]
+    if METRICS_ENABLED and METRICS_MULTIPROC_DIR:
+        tasks.append(asyncio.create_task(publish_metrics_periodically(METRICS_FLUSH_SECONDS)))
+    yield
+    for task in tasks:
+        task.cancel()
+    kdf_pool.shutdown()
+
 
 app = FastAPI(
     title="Billow",
-    version="2.0.0"
+    version="2.0.0",
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -22,13 +103,25 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Added before JWTAuthMiddleware so it runs inside it and sees the authenticated user.
+app.add_middleware(IdempotencyMiddleware)
+
 app.add_middleware(JWTAuthMiddleware)
 
+app.add_middleware(CompressionMiddleware)
+
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+if PROFILING_SECRET:
+    app.add_middleware(ProfilingMiddleware)
+
 app.include_router(auth_router)
 app.include_router(user_router)
 app.include_router(friendship_router)
 app.include_router(event_router)
 app.include_router(expense_router)
+app.include_router(internal_router)
 
 
 @app.get("/")
@@ -5,9 +5,14 @@ from auth.jwt_handler import (
     create_refresh_token,
     decode_access_token,
     decode_refresh_token,
-    generate_reset_token
+    invalidate_access_token,
+    invalidate_access_tokens_for_family,
+    invalidate_access_tokens_for_user,
+    generate_reset_token,
+    hash_reset_token
 )
-from auth.dependencies import get_db, get_current_user, oauth2_scheme
+from auth.dependencies import get_db, get_current_user, get_principal, require_internal_token, oauth2_scheme
+from auth.principal import Principal
 
 __all__ = [
     "verify_password",
@@ -16,9 +21,16 @@ __all__ = [
     "create_refresh_token",
     "decode_access_token",
     "decode_refresh_token",
+    "invalidate_access_token",
+    "invalidate_access_tokens_for_family",
+    "invalidate_access_tokens_for_user",
     "generate_reset_token",
+    "hash_reset_token",
     "get_db",
     "get_current_user",
+    "get_principal",
+    "require_internal_token",
+    "Principal",
     "oauth2_scheme"
 ]
 
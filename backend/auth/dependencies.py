@@ -1,9 +1,15 @@
-from fastapi import Depends, HTTPException, status
+import hmac
+import os
+from typing import Optional
+from fastapi import Depends, Header, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 from database.config import SessionLocal
 from repository.user_repository import UserRepository
 from auth.jwt_handler import decode_access_token
+from auth.principal import Principal, principal_from_payload
+
+INTERNAL_API_TOKEN = os.getenv("INTERNAL_API_TOKEN", "")
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
@@ -16,33 +22,36 @@ def get_db():
         db.close()
 
 
+def get_principal(
+    request: Request,
+    token: str = Depends(oauth2_scheme)
+) -> Principal:
+    principal = getattr(request.state, "principal", None)
+    if principal is None:
+        principal = principal_from_payload(decode_access_token(token))
+    
+    if principal is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    return principal
+
+
 def get_current_user(
-    token: str = Depends(oauth2_scheme),
+    principal: Principal = Depends(get_principal),
     db: Session = Depends(get_db)
 ):
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    
-    payload = decode_access_token(token)
-    if payload is None:
-        raise credentials_exception
-    
-    user_id_str = payload.get("sub")
-    if user_id_str is None:
-        raise credentials_exception
-    
-    try:
-        user_id = int(user_id_str)
-    except (ValueError, TypeError):
-        raise credentials_exception
-    
     user_repo = UserRepository(db)
-    user = user_repo.get_by_id(user_id)
+    user = user_repo.get_active_by_id_cached(principal.user_id)
     if user is None:
-        raise credentials_exception
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     
     if not user.is_active:
         raise HTTPException(
@@ -51,3 +60,15 @@ def get_current_user(
         )
     
     return user
+
+
+def require_internal_token(x_internal_token: Optional[str] = Header(default=None)):
+    # Internal endpoints do not exist unless an operator configured a token for them.
+    if not INTERNAL_API_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    
+    if x_internal_token is None or not hmac.compare_digest(x_internal_token, INTERNAL_API_TOKEN):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Invalid internal token"
+        )
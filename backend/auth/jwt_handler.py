@@ -2,16 +2,27 @@ from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
+import hashlib
 import os
+import time
 from fastapi import HTTPException, status
+from cache import TTLCache
+from auth.revocation import revoked_families
 
 SECRET_KEY = os.getenv("SECRET_KEY", "")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24
 REFRESH_TOKEN_EXPIRE_DAYS = 7
+TOKEN_CACHE_MAX_SIZE = int(os.getenv("TOKEN_CACHE_MAX_SIZE", "10000"))
 
 pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
 
+_verified_access_tokens = TTLCache(maxsize=TOKEN_CACHE_MAX_SIZE)
+
+
+def _token_digest(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
@@ -35,13 +46,35 @@ def create_refresh_token(data: dict) -> str:
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 def decode_access_token(token: str) -> Optional[dict]:
+    digest = _token_digest(token)
+    payload = _verified_access_tokens.get(digest)
+    if payload is not None:
+        return None if revoked_families.is_revoked(payload.get("fam")) else payload
+    
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         if payload.get("type") != "access":
             return None
-        return payload
     except JWTError:
         return None
+    
+    if revoked_families.is_revoked(payload.get("fam")):
+        return None
+    
+    expires_in = payload.get("exp", 0) - time.time()
+    if expires_in > 0:
+        _verified_access_tokens.set(digest, payload, ttl=expires_in)
+    return payload
+
+def invalidate_access_token(token: str):
+    _verified_access_tokens.invalidate(_token_digest(token))
+
+def invalidate_access_tokens_for_user(user_id: int):
+    subject = str(user_id)
+    _verified_access_tokens.invalidate_where(lambda _, payload: payload.get("sub") == subject)
+
+def invalidate_access_tokens_for_family(family_id: str):
+    _verified_access_tokens.invalidate_where(lambda _, payload: payload.get("fam") == family_id)
 
 def decode_refresh_token(token: str) -> Optional[dict]:
     try:
@@ -55,3 +88,10 @@ def decode_refresh_token(token: str) -> Optional[dict]:
 def generate_reset_token() -> str:
     import secrets
     return secrets.token_urlsafe(32)
+
+def hash_reset_token(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+def generate_token_id() -> str:
+    import secrets
+    return secrets.token_hex(16)
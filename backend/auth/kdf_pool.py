@@ -0,0 +1,113 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+from fastapi import HTTPException, status
+from auth.jwt_handler import get_password_hash, verify_password
+
+KDF_POOL_WORKERS = int(os.getenv("KDF_POOL_WORKERS", str(min(4, os.cpu_count() or 1))))
+KDF_QUEUE_LIMIT = int(os.getenv("KDF_QUEUE_LIMIT", "16"))
+KDF_TIMEOUT_SECONDS = float(os.getenv("KDF_TIMEOUT_SECONDS", "10"))
+# Forking the multithreaded server could copy a lock held by another thread into the child; start workers clean.
+KDF_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+def _ready() -> int:
+    return os.getpid()
+
+
+class KdfPool:
+    """Runs password hashing in worker processes, refusing work beyond a bounded backlog."""
+
+    def __init__(self, workers: int, queue_limit: int, timeout: float):
+        self.workers = workers
+        self.max_pending = workers + queue_limit
+        self.timeout = timeout
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context(KDF_START_METHOD)
+                )
+            return self._executor
+
+    def _reset_executor(self, broken: ProcessPoolExecutor):
+        with self._lock:
+            if self._executor is broken:
+                self._executor = None
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def _release(self):
+        with self._lock:
+            self._pending -= 1
+
+    def _on_done(self, _future):
+        # The only place a submitted job gives its slot back, so max_pending bounds hashes that are really queued or running.
+        self._release()
+
+    def _busy(self) -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, please retry shortly",
+            headers={"Retry-After": "1"}
+        )
+
+    def warm_up(self):
+        """Start the worker processes ahead of the first login, which would otherwise pay for their imports"""
+        if self.workers <= 0:
+            return
+        executor = self._get_executor()
+        for future in [executor.submit(_ready) for _ in range(self.workers)]:
+            future.result()
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def run(self, fn, *args):
+        if self.workers <= 0:
+            return fn(*args)
+
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise self._busy()
+            self._pending += 1
+
+        executor = self._get_executor()
+        try:
+            future = executor.submit(fn, *args)
+        except (BrokenProcessPool, RuntimeError):
+            self._release()
+            self._reset_executor(executor)
+            raise self._busy()
+        future.add_done_callback(self._on_done)
+
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            # Cancelling only drops a job that has not started; a running hash keeps its slot until it finishes.
+            future.cancel()
+            raise self._busy()
+        except BrokenProcessPool:
+            self._reset_executor(executor)
+            raise self._busy()
+
+
+kdf_pool = KdfPool(KDF_POOL_WORKERS, KDF_QUEUE_LIMIT, KDF_TIMEOUT_SECONDS)
+
+
+def hash_password_offloaded(password: str) -> str:
+    return kdf_pool.run(get_password_hash, password)
+
+
+def verify_password_offloaded(plain_password: str, hashed_password: str) -> bool:
+    return kdf_pool.run(verify_password, plain_password, hashed_password)
@@ -1,12 +1,50 @@
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
+from typing import Iterable
+from starlette.datastructures import Headers
 from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
 from fastapi import status
 from auth.jwt_handler import decode_access_token
+from auth.principal import principal_from_payload
 
 
-class JWTAuthMiddleware(BaseHTTPMiddleware):
-    
+class PathMatcher:
+    """Matches request paths against exact paths and path prefixes without scanning a list."""
+
+    _TERMINAL = ""
+
+    def __init__(self, exact: Iterable[str], prefixes: Iterable[str] = ()):
+        self.exact = frozenset(exact)
+        self._trie: dict = {}
+        for prefix in prefixes:
+            node = self._trie
+            for char in prefix:
+                node = node.setdefault(char, {})
+            node[self._TERMINAL] = True
+
+    def matches(self, path: str) -> bool:
+        if path in self.exact:
+            return True
+
+        node = self._trie
+        for char in path:
+            if self._TERMINAL in node:
+                return True
+            node = node.get(char)
+            if node is None:
+                return False
+        return self._TERMINAL in node
+
+
+def _unauthorized(detail: str) -> JSONResponse:
+    return JSONResponse(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        content={"detail": detail},
+        headers={"WWW-Authenticate": "Bearer"}
+    )
+
+
+class JWTAuthMiddleware:
+
     EXCLUDED_PATHS = [
         "/auth/login",
         "/auth/register",
@@ -16,52 +54,46 @@ class JWTAuthMiddleware(BaseHTTPMiddleware):
         "/redoc",
         "/"
     ]
-    
-    async def dispatch(self, request: Request, call_next):
-        if request.url.path in self.EXCLUDED_PATHS or request.url.path.startswith("/docs") or request.url.path.startswith("/openapi.json"):
-            return await call_next(request)
-        
-        if request.method == "OPTIONS":
-            return await call_next(request)
-        
-        authorization = request.headers.get("Authorization")
-        
+
+    EXCLUDED_PREFIXES = [
+        "/docs",
+        "/openapi.json",
+        "/internal"
+    ]
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.excluded = PathMatcher(self.EXCLUDED_PATHS, self.EXCLUDED_PREFIXES)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] == "OPTIONS" or self.excluded.matches(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+
+        authorization = Headers(scope=scope).get("authorization")
+
         if not authorization:
-            return JSONResponse(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                content={"detail": "Not authenticated"},
-                headers={"WWW-Authenticate": "Bearer"}
-            )
-        
+            await _unauthorized("Not authenticated")(scope, receive, send)
+            return
+
         parts = authorization.split()
         if len(parts) != 2 or parts[0].lower() != "bearer":
-            return JSONResponse(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                content={"detail": "Invalid authentication header format"},
-                headers={"WWW-Authenticate": "Bearer"}
-            )
-        
-        token = parts[1]
-        
-        payload = decode_access_token(token)
-        
+            await _unauthorized("Invalid authentication header format")(scope, receive, send)
+            return
+
+        payload = decode_access_token(parts[1])
+
         if payload is None:
-            return JSONResponse(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                content={"detail": "Could not validate credentials"},
-                headers={"WWW-Authenticate": "Bearer"}
-            )
-        
-        user_id = payload.get("sub")
-        if not user_id:
-            return JSONResponse(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                content={"detail": "Invalid token payload"},
-                headers={"WWW-Authenticate": "Bearer"}
-            )
-        
-        request.state.user_id = int(user_id) if isinstance(user_id, str) else user_id
-        
-        response = await call_next(request)
-        return response
+            await _unauthorized("Could not validate credentials")(scope, receive, send)
+            return
+
+        principal = principal_from_payload(payload)
+        if principal is None:
+            await _unauthorized("Invalid token payload")(scope, receive, send)
+            return
+
+        state = scope.setdefault("state", {})
+        state["principal"] = principal
+        state["user_id"] = principal.user_id
 
+        await self.app(scope, receive, send)
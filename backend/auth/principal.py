@@ -0,0 +1,24 @@
+from dataclasses import dataclass, field
+from typing import Optional
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Identity established from a verified access token, shared via request.state."""
+
+    user_id: int
+    claims: dict = field(default_factory=dict)
+
+
+def principal_from_payload(payload: Optional[dict]) -> Optional[Principal]:
+    if payload is None:
+        return None
+
+    user_id = payload.get("sub")
+    if not user_id:
+        return None
+
+    try:
+        return Principal(user_id=int(user_id), claims=payload)
+    except (ValueError, TypeError):
+        return None
@@ -0,0 +1,24 @@
+import threading
+from typing import Iterable, Optional
+
+
+class RevocationFilter:
+    """In-memory set of revoked token families, rebuilt from the refresh-token store."""
+
+    def __init__(self):
+        self._family_ids = frozenset()
+        self._lock = threading.Lock()
+
+    def is_revoked(self, family_id: Optional[str]) -> bool:
+        return family_id is not None and family_id in self._family_ids
+
+    def add(self, family_id: str):
+        with self._lock:
+            self._family_ids = self._family_ids | {family_id}
+
+    def rebuild(self, family_ids: Iterable[str]):
+        with self._lock:
+            self._family_ids = frozenset(family_ids)
+
+
+revoked_families = RevocationFilter()
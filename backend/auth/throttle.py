@@ -0,0 +1,165 @@
+import hashlib
+import logging
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from fastapi import HTTPException, Request, status
+
+THROTTLE_ENABLED = os.getenv("THROTTLE_ENABLED", "1") != "0"
+THROTTLE_BACKEND_URL = os.getenv("THROTTLE_BACKEND_URL", "")
+THROTTLE_TRUST_FORWARDED_FOR = os.getenv("THROTTLE_TRUST_FORWARDED_FOR", "0") == "1"
+THROTTLE_SHARDS = 16
+THROTTLE_SHARD_MAX_KEYS = 4096
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ThrottleRule:
+    name: str
+    capacity: int
+    refill_per_second: float
+
+
+LOGIN_PER_IP = ThrottleRule("login:ip", capacity=20, refill_per_second=20 / 60)
+LOGIN_PER_USERNAME = ThrottleRule("login:user", capacity=5, refill_per_second=5 / 60)
+REGISTER_PER_IP = ThrottleRule("register:ip", capacity=5, refill_per_second=5 / 600)
+PASSWORD_RESET_PER_IP = ThrottleRule("reset:ip", capacity=5, refill_per_second=5 / 60)
+PASSWORD_RESET_PER_EMAIL = ThrottleRule("reset:email", capacity=3, refill_per_second=3 / 900)
+
+
+class LocalBucketBackend:
+    """Token buckets held in this process, sharded so unrelated keys never share a lock."""
+
+    def __init__(self, shards: int = THROTTLE_SHARDS, max_keys_per_shard: int = THROTTLE_SHARD_MAX_KEYS):
+        self._shards = [(threading.Lock(), OrderedDict()) for _ in range(shards)]
+        self._max_keys = max_keys_per_shard
+
+    def consume(self, key: str, rule: ThrottleRule, cost: float = 1.0, dry_run: bool = False) -> float:
+        lock, buckets = self._shards[hash(key) % len(self._shards)]
+        now = time.monotonic()
+        with lock:
+            tokens, updated_at = buckets.get(key, (rule.capacity, now))
+            tokens = min(rule.capacity, tokens + (now - updated_at) * rule.refill_per_second)
+            if tokens < cost:
+                return (cost - tokens) / rule.refill_per_second
+            if dry_run:
+                return 0.0
+            buckets[key] = (tokens - cost, now)
+            buckets.move_to_end(key)
+            if len(buckets) > self._max_keys:
+                buckets.popitem(last=False)
+        return 0.0
+
+
+class RedisBucketBackend:
+    """Token buckets shared by every worker through Redis; requires the optional redis package.
+
+    While Redis is unreachable, buckets fall back to this process so authentication keeps working.
+    """
+
+    SCRIPT = """
+    local now_parts = redis.call('TIME')
+    local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+    local capacity = tonumber(ARGV[1])
+    local rate = tonumber(ARGV[2])
+    local cost = tonumber(ARGV[3])
+    local dry_run = ARGV[4] == '1'
+    local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local tokens = tonumber(bucket[1]) or capacity
+    local updated_at = tonumber(bucket[2]) or now
+    tokens = math.min(capacity, tokens + (now - updated_at) * rate)
+    if tokens < cost then
+        return tostring((cost - tokens) / rate)
+    end
+    if dry_run then
+        return '0'
+    end
+    tokens = tokens - cost
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+    redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+    return '0'
+    """
+
+    def __init__(self, url: str):
+        import redis
+
+        self._client = redis.Redis.from_url(url)
+        self._script = self._client.register_script(self.SCRIPT)
+        self._unavailable = (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError)
+        self._fallback = LocalBucketBackend()
+        self._degraded = False
+
+    def consume(self, key: str, rule: ThrottleRule, cost: float = 1.0, dry_run: bool = False) -> float:
+        try:
+            retry_after = float(self._script(
+                keys=[f"billow:throttle:{key}"],
+                args=[rule.capacity, rule.refill_per_second, cost, int(dry_run)]
+            ))
+        except self._unavailable as exc:
+            if not self._degraded:
+                self._degraded = True
+                logger.warning("Throttle backend unavailable, using per-process buckets: %s", exc)
+            return self._fallback.consume(key, rule, cost, dry_run)
+        if self._degraded:
+            self._degraded = False
+            logger.info("Throttle backend reachable again")
+        return retry_after
+
+
+def _create_backend():
+    if THROTTLE_BACKEND_URL.startswith(("redis://", "rediss://")):
+        try:
+            return RedisBucketBackend(THROTTLE_BACKEND_URL)
+        except ImportError:
+            logger.warning("redis is not installed; falling back to per-process throttling")
+    return LocalBucketBackend()
+
+
+backend = _create_backend()
+
+
+def client_ip(request: Request) -> str:
+    if THROTTLE_TRUST_FORWARDED_FOR:
+        forwarded_for = request.headers.get("x-forwarded-for")
+        if forwarded_for:
+            return forwarded_for.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+def _subject_key(value: str) -> str:
+    return hashlib.sha256(value.strip().lower().encode()).hexdigest()[:32]
+
+
+def enforce(*checks: tuple[ThrottleRule, str]):
+    """Consume one token per (rule, subject) pair, or none at all and reject with 429 if any bucket is empty"""
+    if not THROTTLE_ENABLED:
+        return
+
+    keyed = [(f"{rule.name}:{_subject_key(subject)}", rule) for rule, subject in checks]
+    # Checking every bucket before draining any stops a rejected request from spending a victim's username bucket.
+    retry_after = max(backend.consume(key, rule, dry_run=True) for key, rule in keyed)
+    if retry_after <= 0:
+        retry_after = max(backend.consume(key, rule) for key, rule in keyed)
+
+    if retry_after > 0:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many attempts, please try again later",
+            headers={"Retry-After": str(math.ceil(retry_after))}
+        )
+
+
+def throttle_login(request: Request, username: str):
+    enforce((LOGIN_PER_IP, client_ip(request)), (LOGIN_PER_USERNAME, username))
+
+
+def throttle_register(request: Request):
+    enforce((REGISTER_PER_IP, client_ip(request)))
+
+
+def throttle_password_reset_request(request: Request, email: str):
+    enforce((PASSWORD_RESET_PER_IP, client_ip(request)), (PASSWORD_RESET_PER_EMAIL, email))
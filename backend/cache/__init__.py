@@ -0,0 +1,5 @@
+from cache.ttl_cache import TTLCache
+
+__all__ = [
+    "TTLCache"
+]
@@ -3,12 +3,14 @@ from controller.user_controller import router as user_router
 from controller.friendship_controller import router as friendship_router
 from controller.event_controller import router as event_router
 from controller.expense_controller import router as expense_router
+from controller.internal_controller import router as internal_router
 
 __all__ = [
     "auth_router",
     "user_router",
     "friendship_router",
     "event_router",
-    "expense_router"
+    "expense_router",
+    "internal_router"
 ]
 
@@ -1,26 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Header
+from fastapi import APIRouter, Depends, HTTPException, Request, status, Header
 from sqlalchemy.orm import Session
-from auth.dependencies import get_db, get_current_user
+from auth.dependencies import get_db, get_current_user, get_principal
+from auth.principal import Principal
+from auth.throttle import throttle_login, throttle_register, throttle_password_reset_request
 from service.user_service import UserService
+from service.token_service import TokenService
 from schemas.user_schemas import (
-    UserCreate, UserLogin, TokenResponse, UserResponse,
+    UserCreate, UserLogin, TokenResponse, UserResponse, UserProfileResponse,
     PasswordResetRequest, PasswordReset, PasswordChange
 )
 from models.models import User
-from auth.jwt_handler import decode_refresh_token
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def register(user_data: UserCreate, db: Session = Depends(get_db)):
+def register(user_data: UserCreate, http_request: Request, db: Session = Depends(get_db)):
+    throttle_register(http_request)
     user_service = UserService(db)
     user = user_service.create_user(user_data)
     return user
 
 
 @router.post("/login", response_model=TokenResponse)
-def login(credentials: UserLogin, db: Session = Depends(get_db)):
+def login(credentials: UserLogin, http_request: Request, db: Session = Depends(get_db)):
+    throttle_login(http_request, credentials.username)
     user_service = UserService(db)
     user = user_service.authenticate_user(credentials.username, credentials.password)
     access_token, refresh_tkn = user_service.get_tokens(user)
@@ -33,7 +37,8 @@ def login(credentials: UserLogin, db: Session = Depends(get_db)):
 
 
 @router.post("/password-reset-request")
-def password_reset_request(request: PasswordResetRequest, db: Session = Depends(get_db)):
+def password_reset_request(request: PasswordResetRequest, http_request: Request, db: Session = Depends(get_db)):
+    throttle_password_reset_request(http_request, request.email)
     user_service = UserService(db)
     token = user_service.request_password_reset(request.email)
     return {"message": "If email exists, reset token has been generated"}
@@ -43,10 +48,11 @@ def password_reset_request(request: PasswordResetRequest, db: Session = Depends(
 def password_reset(reset_data: PasswordReset, db: Session = Depends(get_db)):
     user_service = UserService(db)
     user = user_service.reset_password(reset_data.token, reset_data.new_password)
+    TokenService(db).revoke_user_sessions(user.id)
     return {"message": "Password has been reset successfully"}
 
 
-@router.get("/me", response_model=UserResponse)
+@router.get("/me", response_model=UserProfileResponse)
 def get_current_user_info(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -59,11 +65,14 @@ def get_current_user_info(
 @router.post("/change-password")
 def change_password(
     password_data: PasswordChange,
+    principal: Principal = Depends(get_principal),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     user_service = UserService(db)
     user_service.change_password(current_user, password_data)
+    # Other sessions may belong to whoever knew the old password; the one making the change stays signed in.
+    TokenService(db).revoke_user_sessions(current_user.id, keep_family_id=principal.claims.get("fam"))
     return {"message": "Password changed successfully"}
 
 
@@ -83,33 +92,8 @@ def refresh_token(authorization: str = Header(None), db: Session = Depends(get_d
         )
     
     refresh_token_str = parts[1]
-    payload = decode_refresh_token(refresh_token_str)
-    
-    if payload is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid or expired refresh token"
-        )
-    
-    user_id_str = payload.get("sub")
-    if user_id_str is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid token payload"
-        )
-    
-    try:
-        user_id = int(user_id_str)
-    except (ValueError, TypeError):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid token payload"
-        )
-    
-    user_service = UserService(db)
-    user = user_service.get_user_by_id(user_id)
-    
-    access_token, new_refresh_token = user_service.get_tokens(user)
+    token_service = TokenService(db)
+    user, access_token, new_refresh_token = token_service.rotate(refresh_token_str)
     
     return TokenResponse(
         access_token=access_token,
@@ -117,3 +101,11 @@ def refresh_token(authorization: str = Header(None), db: Session = Depends(get_d
         user=user
     )
 
+
+@router.post("/logout")
+def logout(principal: Principal = Depends(get_principal), db: Session = Depends(get_db)):
+    family_id = principal.claims.get("fam")
+    if family_id:
+        token_service = TokenService(db)
+        token_service.revoke_family(family_id)
+    return {"message": "Logged out successfully"}
@@ -0,0 +1,73 @@
+import hashlib
+from typing import Optional
+from fastapi import Depends, HTTPException, Request, Response, status
+from sqlalchemy.orm import Session
+from auth.dependencies import get_db, get_current_user
+from repository.version_repository import VersionRepository
+from models.models import User
+
+
+def weak_etag(*parts) -> str:
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()[:24]
+    return f'W/"{digest}"'
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison: W/"x" and "x" name the same representation version.
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in if_none_match.split(","))
+
+
+def check_not_modified(request: Request, response: Response, version: Optional[tuple], *scope):
+    """Answer 304 when the client's copy is current, otherwise tag the response; a missing row falls through to the endpoint's 404"""
+    if version is None:
+        return
+    
+    # Query parameters such as ?shape= or ?fields= select a different representation of the same version.
+    etag = weak_etag(*scope, request.url.query, *version)
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _matches(if_none_match, etag):
+        raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    
+    response.headers["ETag"] = etag
+
+
+def event_etag(
+    event_id: int,
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    check_not_modified(request, response, VersionRepository(db).event_version(event_id), "event", event_id)
+
+
+def event_expenses_etag(
+    event_id: int,
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    check_not_modified(request, response, VersionRepository(db).event_expenses_version(event_id), "expenses", event_id)
+
+
+def user_etag(
+    user_id: int,
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    check_not_modified(request, response, VersionRepository(db).user_version(user_id), "user", user_id)
+
+
+def friends_etag(
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    check_not_modified(request, response, VersionRepository(db).friends_version(current_user.id), "friends", current_user.id)
@@ -1,10 +1,21 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Response, status as http_status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
-from auth.dependencies import get_db, get_current_user
+from typing import List, Literal, Optional, Union
+from auth.dependencies import get_db, get_current_user, get_principal
+from auth.principal import Principal
+from database.config import SessionLocal
+from realtime import hub, event_stream
+from controller.conditional import event_etag
+from controller.shaping import parse_fields, shaped_response
 from service.event_service import EventService
-from schemas.event_schemas import EventCreate, EventResponse, EventUpdate
-from models.models import User
+from service.sync_service import SyncService, SYNC_MAX_CHANGES
+from schemas.event_schemas import (
+    EventCreate, EventResponse, EventCompactResponse, EventUpdate, EventSummary, ParticipantIds,
+    NormalizedEvent, NormalizedEventList
+)
+from schemas.sync_schemas import EventChanges
+from models.models import User, EventStatus
 
 router = APIRouter(prefix="/events", tags=["events"])
 
@@ -19,24 +30,53 @@ def create_event(
     return event_service.create_event(event_data, current_user.id)
 
 
-@router.get("/", response_model=List[EventResponse])
+def shaped_events(event_service: EventService, events, response: Response, shape: str, fields: Optional[str], model=EventResponse):
+    if shape == "normalized":
+        selected = parse_fields(fields, NormalizedEvent)
+        return shaped_response(NormalizedEventList, event_service.normalize_events(events), response, selected, envelope=True)
+    
+    selected = parse_fields(fields, model)
+    if selected is None:
+        return events
+    return shaped_response(List[model], events, response, selected)
+
+
+@router.get("/", response_model=Union[List[EventResponse], NormalizedEventList])
 def get_events(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    shape: Literal["embedded", "normalized"] = "embedded",
+    fields: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     event_service = EventService(db)
-    return event_service.get_all_events(skip, limit)
+    return shaped_events(event_service, event_service.get_all_events(skip, limit), response, shape, fields)
 
 
-@router.get("/me", response_model=List[EventResponse])
+@router.get("/me", response_model=Union[List[EventResponse], List[EventCompactResponse], NormalizedEventList])
 def get_user_events(
+    response: Response,
+    status: Optional[EventStatus] = None,
+    view: Literal["full", "compact"] = "full",
+    shape: Literal["embedded", "normalized"] = "embedded",
+    fields: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
+    compact = view == "compact"
+    if compact and shape == "normalized":
+        raise HTTPException(
+            status_code=http_status.HTTP_400_BAD_REQUEST,
+            detail="The compact view embeds no users to normalize"
+        )
+    
     event_service = EventService(db)
-    return event_service.get_user_events(current_user.id)
+    events = event_service.get_user_events(current_user.id, status, skip, limit, compact=compact)
+    return shaped_events(event_service, events, response, shape, fields, EventCompactResponse if compact else EventResponse)
 
 
 @router.get("/me/active", response_model=List[EventResponse])
@@ -50,7 +90,19 @@ def get_user_active_events(
     return event_service.get_user_active_events(current_user.id, skip, limit)
 
 
-@router.get("/{event_id}", response_model=EventResponse)
+@router.get("/me/summary", response_model=List[EventSummary])
+def get_user_event_summaries(
+    status: Optional[EventStatus] = None,
+    skip: int = 0,
+    limit: int = 100,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    event_service = EventService(db)
+    return event_service.get_user_event_summaries(current_user.id, status, skip, limit)
+
+
+@router.get("/{event_id}", response_model=EventResponse, dependencies=[Depends(event_etag)])
 def get_event(
     event_id: int,
     db: Session = Depends(get_db),
@@ -60,6 +112,56 @@ def get_event(
     return event_service.get_event_by_id(event_id)
 
 
+@router.get("/{event_id}/changes", response_model=EventChanges)
+def get_event_changes(
+    event_id: int,
+    since: int = 0,
+    limit: int = SYNC_MAX_CHANGES,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    sync_service = SyncService(db)
+    return sync_service.get_event_changes(event_id, current_user.id, since, limit)
+
+
+@router.get("/{event_id}/stream")
+def stream_event_updates(
+    event_id: int,
+    principal: Principal = Depends(get_principal)
+):
+    # The stream outlives the request, so it must not pin a pooled connection via get_db.
+    with SessionLocal() as db:
+        current_user = get_current_user(principal, db)
+        EventService(db).check_participant(event_id, current_user.id)
+    return StreamingResponse(
+        event_stream(hub, event_id, current_user.id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/{event_id}/participants", response_model=EventResponse)
+def add_participants(
+    event_id: int,
+    participants: ParticipantIds,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    event_service = EventService(db)
+    return event_service.add_participants(event_id, participants.user_ids, current_user.id)
+
+
+@router.delete("/{event_id}/participants", response_model=EventResponse)
+def remove_participants(
+    event_id: int,
+    participants: ParticipantIds,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    event_service = EventService(db)
+    return event_service.remove_participants(event_id, participants.user_ids, current_user.id)
+
+
 @router.post("/{event_id}/participants/{user_id}", response_model=EventResponse)
 def add_participant(
     event_id: int,
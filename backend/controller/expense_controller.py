@@ -1,9 +1,13 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Literal, Optional, Union
 from auth.dependencies import get_db, get_current_user
+from controller.conditional import event_expenses_etag
+from controller.shaping import parse_fields, shaped_response
 from service.expense_service import ExpenseService
-from schemas.expense_schemas import ExpenseCreate, ExpenseResponse, ExpenseUpdate, EventBalance
+from schemas.expense_schemas import (
+    ExpenseCreate, ExpenseResponse, ExpenseUpdate, EventBalance, NormalizedExpense, NormalizedExpenseList
+)
 from models.models import User
 
 router = APIRouter(prefix="/expenses", tags=["expenses"])
@@ -19,14 +23,32 @@ def create_expense(
     return expense_service.create_expense(expense_data)
 
 
-@router.get("/event/{event_id}", response_model=List[ExpenseResponse])
+@router.get(
+    "/event/{event_id}",
+    response_model=Union[List[ExpenseResponse], NormalizedExpenseList],
+    dependencies=[Depends(event_expenses_etag)]
+)
 def get_event_expenses(
     event_id: int,
+    response: Response,
+    shape: Literal["embedded", "normalized"] = "embedded",
+    fields: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     expense_service = ExpenseService(db)
-    return expense_service.get_event_expenses(event_id)
+    if shape == "normalized":
+        selected = parse_fields(fields, NormalizedExpense)
+        expenses = expense_service.get_event_expenses(event_id)
+        return shaped_response(
+            NormalizedExpenseList, expense_service.normalize_expenses(expenses), response, selected, envelope=True
+        )
+    
+    selected = parse_fields(fields, ExpenseResponse)
+    expenses = expense_service.get_event_expenses(event_id)
+    if selected is None:
+        return expenses
+    return shaped_response(List[ExpenseResponse], expenses, response, selected)
 
 
 @router.get("/{expense_id}", response_model=ExpenseResponse)
@@ -1,9 +1,10 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 from typing import List
 from auth.dependencies import get_db, get_current_user
+from controller.conditional import friends_etag
 from service.user_service import FriendshipService
-from schemas.friendship_schemas import FriendshipResponse, FriendshipRequestResponse
+from schemas.friendship_schemas import FriendshipResponse, FriendshipRequestResponse, FriendSuggestion
 from models.models import User
 
 router = APIRouter(prefix="/friends", tags=["friendships"])
@@ -19,6 +20,16 @@ def send_friend_request(
     return friendship_service.send_friend_request(current_user.id, friend_id)
 
 
+@router.get("/suggestions", response_model=List[FriendSuggestion])
+def get_friend_suggestions(
+    limit: int = Query(20, ge=1, le=100),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    friendship_service = FriendshipService(db)
+    return friendship_service.get_suggestions(current_user.id, limit)
+
+
 @router.get("/requests/pending", response_model=List[FriendshipRequestResponse])
 def get_pending_requests(
     current_user: User = Depends(get_current_user),
@@ -77,7 +88,7 @@ def reject_friend_request(
     return friendship_service.reject_friend_request(current_user.id, friendship_id)
 
 
-@router.get("/", response_model=List[FriendshipResponse])
+@router.get("/", response_model=List[FriendshipResponse], dependencies=[Depends(friends_etag)])
 def get_friends(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
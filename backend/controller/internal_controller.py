@@ -0,0 +1,34 @@
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from starlette.concurrency import run_in_threadpool
+from auth.dependencies import require_internal_token
+from middleware.compression import compression_stats
+from metrics.exposition import CONTENT_TYPE, render_metrics
+from profiling.reports import load_report
+
+router = APIRouter(
+    prefix="/internal",
+    tags=["internal"],
+    include_in_schema=False,
+    dependencies=[Depends(require_internal_token)]
+)
+
+
+@router.get("/compression")
+async def get_compression_stats():
+    return compression_stats.snapshot()
+
+
+@router.get("/metrics")
+async def get_metrics():
+    return Response(content=await render_metrics(), media_type=CONTENT_TYPE)
+
+
+@router.get("/profiles/{profile_id}")
+async def get_profile(profile_id: str):
+    report = await run_in_threadpool(load_report, profile_id)
+    if report is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found"
+        )
+    return report
@@ -0,0 +1,39 @@
+from functools import lru_cache
+from typing import Any, Optional, Set, Type
+from fastapi import HTTPException, Response, status
+from pydantic import BaseModel, TypeAdapter
+
+
+@lru_cache(maxsize=None)
+def _adapter(response_type) -> TypeAdapter:
+    return TypeAdapter(response_type)
+
+
+def parse_fields(fields: Optional[str], model: Type[BaseModel]) -> Optional[Set[str]]:
+    """Turn ?fields=a,b into an include set for model, always keeping id so entries stay addressable"""
+    if fields is None:
+        return None
+    
+    selected = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = selected - model.model_fields.keys()
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}"
+        )
+    
+    return selected | {"id"}
+
+
+def shaped_response(response_type, content: Any, response: Response, fields: Optional[Set[str]] = None, envelope: bool = False) -> Response:
+    """Validate ORM content once and dump only the selected fields, keeping headers set by dependencies such as ETag"""
+    adapter = _adapter(response_type)
+    include = None
+    if fields is not None:
+        include = {"data": {"__all__": fields}, "included": True} if envelope else {"__all__": fields}
+    
+    return Response(
+        content=adapter.dump_json(adapter.validate_python(content, from_attributes=True), include=include),
+        media_type="application/json",
+        headers={key: value for key, value in response.headers.items() if key not in ("content-length", "content-type")}
+    )
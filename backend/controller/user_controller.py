@@ -1,9 +1,13 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
-from typing import List
+from typing import Dict, List
 from auth.dependencies import get_db, get_current_user
-from service.user_service import UserService
+from controller.conditional import user_etag
+from service.user_service import UserService, FriendshipService
 from schemas.user_schemas import UserResponse, UserUpdate
+from schemas.friendship_schemas import (
+    MutualFriendsResponse, FriendshipStatusResponse, FriendshipStatusQuery, UserSearchResult
+)
 from models.models import User
 
 router = APIRouter(prefix="/users", tags=["users"])
@@ -20,11 +24,12 @@ def get_users(
     return user_service.get_all_users(skip, limit)
 
 
-@router.get("/search", response_model=List[UserResponse])
+@router.get("/search", response_model=List[UserSearchResult])
 def search_users(
     q: str,
     page: int = 1,
     limit: int = 20,
+    include_status: bool = False,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -33,7 +38,28 @@ def search_users(
     user_service = UserService(db)
     skip = (page - 1) * limit
     users = user_service.search_users(q.strip(), skip, limit)
-    return [u for u in users if u.id != current_user.id]
+    users = [u for u in users if u.id != current_user.id]
+    if not include_status:
+        return users
+    
+    friendship_service = FriendshipService(db)
+    statuses = friendship_service.get_friendship_statuses(current_user.id, [u.id for u in users])
+    return [
+        UserSearchResult.model_validate(u).model_copy(
+            update={"friendship": FriendshipStatusResponse(**statuses[u.id])}
+        )
+        for u in users
+    ]
+
+
+@router.post("/friendship-status", response_model=Dict[int, FriendshipStatusResponse])
+def get_friendship_statuses(
+    query: FriendshipStatusQuery,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    friendship_service = FriendshipService(db)
+    return friendship_service.get_friendship_statuses(current_user.id, query.user_ids)
 
 
 @router.get("/friendship-status/{user_id}")
@@ -42,21 +68,11 @@ def get_friendship_status(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    from service.user_service import FriendshipService
     friendship_service = FriendshipService(db)
-    friendship = friendship_service.friendship_repo.get_by_ids(current_user.id, user_id)
-    
-    if not friendship:
-        return {"status": "none"}
-    
-    return {
-        "status": friendship.status.value,
-        "friendship_id": friendship.id,
-        "is_sender": friendship.user_id == current_user.id
-    }
+    return friendship_service.get_friendship_status(current_user.id, user_id)
 
 
-@router.get("/{user_id}", response_model=UserResponse)
+@router.get("/{user_id}", response_model=UserResponse, dependencies=[Depends(user_etag)])
 def get_user(
     user_id: int,
     db: Session = Depends(get_db),
@@ -66,6 +82,17 @@ def get_user(
     return user_service.get_user_by_id(user_id)
 
 
+@router.get("/{user_id}/mutual", response_model=MutualFriendsResponse)
+def get_mutual_friends(
+    user_id: int,
+    limit: int = Query(100, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    friendship_service = FriendshipService(db)
+    return friendship_service.get_mutual_friends(current_user.id, user_id, limit)
+
+
 @router.put("/me", response_model=UserResponse)
 def update_user(
     user_data: UserUpdate,
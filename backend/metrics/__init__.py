@@ -0,0 +1,14 @@
+from metrics.registry import RequestMetrics, request_metrics, merge_snapshots
+from metrics.exposition import CONTENT_TYPE, METRICS_MULTIPROC_DIR, publish_snapshot, render_metrics, worker_snapshot, write_snapshot
+
+__all__ = [
+    "RequestMetrics",
+    "request_metrics",
+    "merge_snapshots",
+    "CONTENT_TYPE",
+    "METRICS_MULTIPROC_DIR",
+    "publish_snapshot",
+    "render_metrics",
+    "worker_snapshot",
+    "write_snapshot"
+]
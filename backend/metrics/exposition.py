@@ -0,0 +1,238 @@
+import json
+import os
+import re
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional
+import anyio.to_thread
+from database.config import engine
+from metrics.registry import LATENCY_BUCKETS, RequestMetrics, merge_snapshots, request_metrics
+from middleware.compression import compression_stats
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+METRICS_MULTIPROC_DIR = os.getenv("METRICS_MULTIPROC_DIR", "")
+RETIRED_SNAPSHOT = "metrics-retired.json"
+
+_WORKER_FILE = re.compile(r"^metrics-(\d+)-\d+\.json$")
+_worker_file = (0, "")
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(**labels) -> str:
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _pool_gauges() -> Dict[str, float]:
+    pool = engine.pool
+    gauges = {}
+    if hasattr(pool, "checkedout"):
+        gauges["db_pool_checked_out"] = pool.checkedout()
+    if hasattr(pool, "size"):
+        gauges["db_pool_size"] = pool.size()
+    return gauges
+
+
+def collect_gauges(metrics: RequestMetrics = request_metrics) -> Dict[str, float]:
+    """Point-in-time gauges for this worker; must run on the event loop to read the thread limiter"""
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    return {
+        "http_requests_in_flight": metrics.in_flight,
+        "threadpool_tokens_borrowed": limiter.borrowed_tokens,
+        "threadpool_tokens_total": limiter.total_tokens,
+        **_pool_gauges(),
+    }
+
+
+def worker_snapshot(metrics: RequestMetrics = request_metrics) -> dict:
+    return {
+        **metrics.snapshot(),
+        "gauges": collect_gauges(metrics),
+        "compression": compression_stats.snapshot(),
+    }
+
+
+def _snapshot_name() -> str:
+    global _worker_file
+    pid = os.getpid()
+    if _worker_file[0] != pid:
+        # Named per process start, so a recycled pid never overwrites the counters of the worker that held it before.
+        _worker_file = (pid, f"metrics-{pid}-{time.time_ns()}.json")
+    return _worker_file[1]
+
+
+def _write_json(path: str, data: dict):
+    # The rename keeps readers from seeing partial files.
+    fd, temporary = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".metrics-")
+    with os.fdopen(fd, "w") as handle:
+        json.dump(data, handle)
+    os.replace(temporary, path)
+
+
+def _read_json(path: str) -> Optional[dict]:
+    try:
+        with open(path) as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return None
+
+
+def write_snapshot(snapshot: dict, directory: str = METRICS_MULTIPROC_DIR):
+    """Publish this worker's snapshot for the others to aggregate; does file I/O, so keep it off the event loop"""
+    _write_json(os.path.join(directory, _snapshot_name()), snapshot)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _exited(name: str) -> bool:
+    match = _WORKER_FILE.match(name)
+    if match is None:
+        return False
+    pid = int(match.group(1))
+    if pid == os.getpid():
+        return name != _snapshot_name()
+    return not _pid_alive(pid)
+
+
+@contextmanager
+def _directory_lock(directory: str):
+    with open(os.path.join(directory, ".metrics.lock"), "a") as handle:
+        fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def _as_snapshot(snapshots: List[dict]) -> dict:
+    merged = merge_snapshots(snapshots)
+    return {
+        "pid": None,
+        "buckets": list(LATENCY_BUCKETS),
+        "requests": [[*key, count] for key, count in merged["requests"].items()],
+        "latency": [[*key, counts, total] for key, (counts, total) in merged["latency"].items()],
+        "gauges": {},
+        "compression": _sum_compression(snapshots),
+    }
+
+
+def retire_exited_workers(directory: str = METRICS_MULTIPROC_DIR):
+    """Fold the counters of exited workers into one aggregate file and delete their per-process files"""
+    if fcntl is None:
+        return
+    with _directory_lock(directory):
+        exited = [name for name in os.listdir(directory) if _exited(name)]
+        if not exited:
+            return
+        retired_path = os.path.join(directory, RETIRED_SNAPSHOT)
+        snapshots = [_read_json(os.path.join(directory, name)) for name in exited]
+        snapshots.append(_read_json(retired_path))
+        _write_json(retired_path, _as_snapshot([snapshot for snapshot in snapshots if snapshot is not None]))
+        for name in exited:
+            os.remove(os.path.join(directory, name))
+
+
+def read_snapshots(directory: str = METRICS_MULTIPROC_DIR) -> List[dict]:
+    snapshots = []
+    for name in os.listdir(directory):
+        if not (name.startswith("metrics-") and name.endswith(".json")):
+            continue
+        snapshot = _read_json(os.path.join(directory, name))
+        if snapshot is not None:
+            snapshots.append(snapshot)
+    return snapshots
+
+
+def publish_snapshot(snapshot: dict, directory: str = METRICS_MULTIPROC_DIR):
+    write_snapshot(snapshot, directory)
+    retire_exited_workers(directory)
+
+
+def _sum_gauges(snapshots: Iterable[dict]) -> Dict[str, float]:
+    # Counters of exited workers still count; their gauges describe nothing anymore.
+    totals: Dict[str, float] = {}
+    for snapshot in snapshots:
+        if snapshot["pid"] is None:
+            continue
+        if snapshot["pid"] != os.getpid() and not _pid_alive(snapshot["pid"]):
+            continue
+        for name, value in snapshot["gauges"].items():
+            totals[name] = totals.get(name, 0) + value
+    return totals
+
+
+def _sum_compression(snapshots: Iterable[dict]) -> Dict[str, dict]:
+    totals: Dict[str, dict] = {}
+    for snapshot in snapshots:
+        for route, stats in snapshot["compression"].items():
+            merged = totals.setdefault(route, {"responses": 0, "bytes_in": 0, "bytes_out": 0})
+            for field in merged:
+                merged[field] += stats[field]
+    return totals
+
+
+def render(snapshots: List[dict], buckets: Optional[List[float]] = None) -> str:
+    buckets = buckets or list(LATENCY_BUCKETS)
+    merged = merge_snapshots(snapshots)
+    lines = [
+        "# HELP billow_http_requests_total Requests handled, by route template and status.",
+        "# TYPE billow_http_requests_total counter",
+    ]
+    for (method, route, status_code), count in sorted(merged["requests"].items()):
+        lines.append(f"billow_http_requests_total{_labels(method=method, route=route, status=status_code)} {count}")
+
+    lines += [
+        "# HELP billow_http_request_duration_seconds Request latency, by route template.",
+        "# TYPE billow_http_request_duration_seconds histogram",
+    ]
+    for (method, route), (counts, total) in sorted(merged["latency"].items()):
+        cumulative = 0
+        for bound, count in zip([*buckets, "+Inf"], counts):
+            cumulative += count
+            lines.append(
+                f"billow_http_request_duration_seconds_bucket{_labels(method=method, route=route, le=bound)} {cumulative}"
+            )
+        lines.append(f"billow_http_request_duration_seconds_sum{_labels(method=method, route=route)} {total}")
+        lines.append(f"billow_http_request_duration_seconds_count{_labels(method=method, route=route)} {cumulative}")
+
+    for name, value in sorted(_sum_gauges(snapshots).items()):
+        lines += [f"# TYPE billow_{name} gauge", f"billow_{name} {value}"]
+
+    compression = _sum_compression(snapshots)
+    for field in ("bytes_in", "bytes_out"):
+        lines.append(f"# TYPE billow_compression_{field}_total counter")
+        for route, stats in sorted(compression.items()):
+            lines.append(f"billow_compression_{field}_total{_labels(route=route)} {stats[field]}")
+
+    return "\n".join(lines) + "\n"
+
+
+def _render_shared(snapshot: dict, directory: str) -> str:
+    publish_snapshot(snapshot, directory)
+    return render(read_snapshots(directory))
+
+
+async def render_metrics() -> str:
+    """Prometheus text for this worker, or for every worker when METRICS_MULTIPROC_DIR is set"""
+    # Gauges are read here on the event loop; only the snapshot files are handled in the threadpool.
+    snapshot = worker_snapshot()
+    if not METRICS_MULTIPROC_DIR:
+        return render([snapshot])
+    return await anyio.to_thread.run_sync(_render_shared, snapshot, METRICS_MULTIPROC_DIR)
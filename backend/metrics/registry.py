@@ -0,0 +1,54 @@
+import os
+from bisect import bisect_left
+from typing import Dict, List, Tuple
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class RequestMetrics:
+    """Per-route request counters and latency histograms for this worker.
+
+    Only the event loop thread mutates them, so plain dicts and ints are safe without locks.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.requests: Dict[Tuple[str, str, int], int] = {}
+        self.latency: Dict[Tuple[str, str], list] = {}
+        self.in_flight = 0
+
+    def observe(self, method: str, route: str, status_code: int, seconds: float):
+        key = (method, route, status_code)
+        self.requests[key] = self.requests.get(key, 0) + 1
+
+        histogram = self.latency.get((method, route))
+        if histogram is None:
+            histogram = self.latency[(method, route)] = [[0] * (len(self.buckets) + 1), 0.0]
+        histogram[0][bisect_left(self.buckets, seconds)] += 1
+        histogram[1] += seconds
+
+    def snapshot(self) -> dict:
+        return {
+            "pid": os.getpid(),
+            "buckets": list(self.buckets),
+            "requests": [[method, route, status_code, count] for (method, route, status_code), count in self.requests.items()],
+            "latency": [[method, route, list(counts), total] for (method, route), (counts, total) in self.latency.items()],
+        }
+
+
+def merge_snapshots(snapshots: List[dict]) -> dict:
+    """Sum counters and histograms from every worker's snapshot; all workers share the bucket layout"""
+    requests: Dict[tuple, int] = {}
+    latency: Dict[tuple, list] = {}
+    for snapshot in snapshots:
+        for method, route, status_code, count in snapshot["requests"]:
+            key = (method, route, status_code)
+            requests[key] = requests.get(key, 0) + count
+        for method, route, counts, total in snapshot["latency"]:
+            merged = latency.setdefault((method, route), [[0] * len(counts), 0.0])
+            merged[0] = [a + b for a, b in zip(merged[0], counts)]
+            merged[1] += total
+    return {"requests": requests, "latency": latency}
+
+
+request_metrics = RequestMetrics()
@@ -0,0 +1,16 @@
+from middleware.compression import CompressionMiddleware, CompressionStats, compression_stats
+from middleware.idempotency import IdempotencyMiddleware, IdempotencyStore, idempotency_store
+from middleware.metrics import MetricsMiddleware
+from middleware.profiling import ProfilingMiddleware, sign_request
+
+__all__ = [
+    "CompressionMiddleware",
+    "CompressionStats",
+    "compression_stats",
+    "IdempotencyMiddleware",
+    "IdempotencyStore",
+    "idempotency_store",
+    "MetricsMiddleware",
+    "ProfilingMiddleware",
+    "sign_request"
+]
@@ -0,0 +1,153 @@
+import gzip
+import os
+from typing import Dict, Iterable, Optional
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "1") != "0"
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+COMPRESSION_OFFLOAD_SIZE = int(os.getenv("COMPRESSION_OFFLOAD_SIZE", str(256 * 1024)))
+COMPRESSION_CONTENT_TYPES = [
+    content_type.strip()
+    for content_type in os.getenv(
+        "COMPRESSION_CONTENT_TYPES",
+        "application/json,text/plain,text/html,text/css,application/javascript"
+    ).split(",")
+    if content_type.strip()
+]
+
+
+class CompressionStats:
+    """Per-route compression totals; only touched from the event loop, so no lock is needed."""
+
+    def __init__(self):
+        self._routes: Dict[str, list] = {}
+
+    def record(self, route: str, encoding: str, original: int, compressed: int):
+        totals = self._routes.setdefault(route, [0, 0, 0, {}])
+        totals[0] += 1
+        totals[1] += original
+        totals[2] += compressed
+        totals[3][encoding] = totals[3].get(encoding, 0) + 1
+
+    def snapshot(self) -> Dict[str, dict]:
+        return {
+            route: {
+                "responses": responses,
+                "bytes_in": bytes_in,
+                "bytes_out": bytes_out,
+                "bytes_saved": bytes_in - bytes_out,
+                "encodings": dict(encodings)
+            }
+            for route, (responses, bytes_in, bytes_out, encodings) in self._routes.items()
+        }
+
+
+compression_stats = CompressionStats()
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.partition(";")
+        params = params.strip().replace(" ", "")
+        try:
+            quality = float(params[2:]) if params.startswith("q=") else 1.0
+        except ValueError:
+            quality = 0.0
+        if quality > 0:
+            accepted.add(name.strip())
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str, gzip_level: int, brotli_quality: int) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=brotli_quality)
+    return gzip.compress(body, compresslevel=gzip_level, mtime=0)
+
+
+class CompressionMiddleware:
+    """Compresses complete responses; streamed and already-encoded bodies pass through untouched."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = COMPRESSION_MIN_SIZE,
+        gzip_level: int = COMPRESSION_GZIP_LEVEL,
+        brotli_quality: int = COMPRESSION_BROTLI_QUALITY,
+        content_types: Iterable[str] = COMPRESSION_CONTENT_TYPES,
+        stats: CompressionStats = compression_stats
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.content_types = frozenset(content_types)
+        self.stats = stats
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not COMPRESSION_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Optional[Message] = None
+        passthrough = False
+
+        async def send_wrapper(message: Message):
+            nonlocal start_message, passthrough
+
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                start_message = message
+                headers = Headers(raw=message["headers"])
+                content_type = headers.get("content-type", "").split(";")[0].strip().lower()
+                if "content-encoding" in headers or content_type not in self.content_types:
+                    passthrough = True
+                    await send(message)
+                return
+
+            body = message.get("body", b"")
+            if message.get("more_body", False) or len(body) < self.minimum_size:
+                # Streams are never buffered: the first chunk decides, and small bodies are not worth it.
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            if len(body) >= COMPRESSION_OFFLOAD_SIZE:
+                compressed = await run_in_threadpool(compress, body, encoding, self.gzip_level, self.brotli_quality)
+            else:
+                compressed = compress(body, encoding, self.gzip_level, self.brotli_quality)
+
+            headers = MutableHeaders(raw=start_message["headers"])
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+
+            route = scope.get("route")
+            self.stats.record(getattr(route, "path", "unmatched"), encoding, len(body), len(compressed))
+
+            await send(start_message)
+            await send({"type": "http.response.body", "body": compressed, "more_body": False})
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,244 @@
+import hashlib
+import os
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional, Union
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse, Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from fastapi import status
+from auth.middleware import PathMatcher
+from cache import TTLCache
+from database.config import SessionLocal
+from models.models import IdempotencyKey
+from repository.idempotency_repository import IdempotencyRepository
+
+IDEMPOTENCY_TTL_SECONDS = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", str(24 * 3600)))
+IDEMPOTENCY_LOCK_SECONDS = float(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "60"))
+IDEMPOTENCY_CACHE_MAX_SIZE = int(os.getenv("IDEMPOTENCY_CACHE_MAX_SIZE", "4096"))
+IDEMPOTENCY_MAX_BODY_BYTES = int(os.getenv("IDEMPOTENCY_MAX_BODY_BYTES", str(256 * 1024)))
+IDEMPOTENCY_KEY_MAX_LENGTH = 128
+
+CLAIMED = "claimed"
+IN_FLIGHT = "in_flight"
+MISMATCH = "mismatch"
+
+
+@dataclass(frozen=True)
+class StoredResponse:
+    fingerprint: str
+    status_code: int
+    content_type: Optional[str]
+    body: bytes
+
+
+class IdempotencyStore:
+    """Idempotency records kept in the database, with an LRU of finished responses in front of it."""
+
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        ttl: float = IDEMPOTENCY_TTL_SECONDS,
+        lock_timeout: float = IDEMPOTENCY_LOCK_SECONDS,
+        cache_size: int = IDEMPOTENCY_CACHE_MAX_SIZE
+    ):
+        self.session_factory = session_factory
+        self.ttl = timedelta(seconds=ttl)
+        self.lock_timeout = timedelta(seconds=lock_timeout)
+        self._completed = TTLCache(maxsize=cache_size, ttl=ttl)
+
+    def cached(self, user_id: int, key: str) -> Optional[StoredResponse]:
+        return self._completed.get((user_id, key))
+
+    def begin(self, user_id: int, key: str, fingerprint: str) -> Union[str, StoredResponse]:
+        """Claim the key for this request, or report why it cannot run: replay, in flight or mismatch"""
+        now = datetime.utcnow()
+        db = self.session_factory()
+        try:
+            repo = IdempotencyRepository(db)
+            record = IdempotencyKey(
+                user_id=user_id,
+                key=key,
+                fingerprint=fingerprint,
+                locked_at=now,
+                expires_at=now + self.ttl
+            )
+            if repo.claim(record) or repo.take_over_stale(record, now - self.lock_timeout):
+                return CLAIMED
+            
+            existing = repo.get(user_id, key)
+            if existing is None:
+                return IN_FLIGHT
+            if existing.fingerprint != fingerprint:
+                return MISMATCH
+            if existing.status_code is None:
+                return IN_FLIGHT
+            
+            stored = StoredResponse(existing.fingerprint, existing.status_code, existing.content_type, existing.response_body)
+            self._completed.set((user_id, key), stored)
+            return stored
+        finally:
+            db.close()
+
+    def complete(self, user_id: int, key: str, stored: StoredResponse):
+        db = self.session_factory()
+        try:
+            IdempotencyRepository(db).complete(user_id, key, stored.status_code, stored.content_type, stored.body)
+        finally:
+            db.close()
+        self._completed.set((user_id, key), stored)
+
+    def release(self, user_id: int, key: str):
+        db = self.session_factory()
+        try:
+            IdempotencyRepository(db).release(user_id, key)
+        finally:
+            db.close()
+
+    def purge_expired(self) -> int:
+        db = self.session_factory()
+        try:
+            return IdempotencyRepository(db).delete_expired(datetime.utcnow())
+        finally:
+            db.close()
+
+
+idempotency_store = IdempotencyStore()
+
+
+def _error(status_code: int, detail: str) -> JSONResponse:
+    return JSONResponse(status_code=status_code, content={"detail": detail})
+
+
+async def _read_body(receive: Receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] != "http.request":
+            break
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            break
+    return b"".join(chunks)
+
+
+def request_fingerprint(scope: Scope, body: bytes) -> str:
+    digest = hashlib.sha256()
+    for part in (scope["method"].encode(), scope["path"].encode(), scope.get("query_string", b""), body):
+        digest.update(part)
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class IdempotencyMiddleware:
+    """Replays the original response for retried writes that carry the same Idempotency-Key."""
+
+    PATHS = [
+        "/expenses/",
+        "/events/"
+    ]
+
+    PREFIXES = [
+        "/friends/request/"
+    ]
+
+    def __init__(self, app: ASGIApp, store: IdempotencyStore = idempotency_store):
+        self.app = app
+        self.store = store
+        self.routes = PathMatcher(self.PATHS, self.PREFIXES)
+        # Keys executing in this worker; only touched from the event loop.
+        self._in_flight = set()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] != "POST" or not self.routes.matches(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+
+        key = Headers(scope=scope).get("idempotency-key")
+        user_id = scope.get("state", {}).get("user_id")
+        if key is None or user_id is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not key.strip() or len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+            await _error(status.HTTP_400_BAD_REQUEST, "Invalid Idempotency-Key header")(scope, receive, send)
+            return
+
+        body = await _read_body(receive)
+        fingerprint = request_fingerprint(scope, body)
+        slot = (user_id, key)
+
+        if slot in self._in_flight:
+            outcome = IN_FLIGHT
+        else:
+            outcome = self.store.cached(user_id, key) or await run_in_threadpool(self.store.begin, user_id, key, fingerprint)
+
+        if outcome == MISMATCH or (isinstance(outcome, StoredResponse) and outcome.fingerprint != fingerprint):
+            await _error(
+                status.HTTP_422_UNPROCESSABLE_CONTENT,
+                "Idempotency-Key was already used for a different request"
+            )(scope, receive, send)
+            return
+
+        if outcome == IN_FLIGHT:
+            await _error(
+                status.HTTP_409_CONFLICT,
+                "A request with this Idempotency-Key is still being processed"
+            )(scope, receive, send)
+            return
+
+        if isinstance(outcome, StoredResponse):
+            replay = Response(
+                content=outcome.body,
+                status_code=outcome.status_code,
+                media_type=outcome.content_type,
+                headers={"Idempotent-Replayed": "true"}
+            )
+            await replay(scope, receive, send)
+            return
+
+        self._in_flight.add(slot)
+        try:
+            await self._execute(scope, receive, send, user_id, key, fingerprint, body)
+        finally:
+            self._in_flight.discard(slot)
+
+    async def _execute(self, scope: Scope, receive: Receive, send: Send, user_id: int, key: str, fingerprint: str, body: bytes):
+        body_delivered = False
+        response_status = status.HTTP_500_INTERNAL_SERVER_ERROR
+        content_type = None
+        chunks = []
+        size = 0
+
+        async def replay_receive() -> Message:
+            nonlocal body_delivered
+            if not body_delivered:
+                body_delivered = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        async def send_wrapper(message: Message):
+            nonlocal response_status, content_type, size
+            if message["type"] == "http.response.start":
+                response_status = message["status"]
+                content_type = Headers(raw=message["headers"]).get("content-type")
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+                if size <= IDEMPOTENCY_MAX_BODY_BYTES:
+                    chunks.append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, replay_receive, send_wrapper)
+        except Exception:
+            await run_in_threadpool(self.store.release, user_id, key)
+            raise
+
+        if response_status >= 500 or size > IDEMPOTENCY_MAX_BODY_BYTES:
+            # Server failures and oversized bodies are not remembered, so the client may retry them.
+            await run_in_threadpool(self.store.release, user_id, key)
+            return
+
+        stored = StoredResponse(fingerprint, response_status, content_type, b"".join(chunks))
+        await run_in_threadpool(self.store.complete, user_id, key, stored)
@@ -0,0 +1,115 @@
+import hashlib
+import hmac
+import os
+import secrets
+import sys
+import threading
+import time
+from collections import deque
+from typing import Optional
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from profiling.sampler import Sampler, active_sampler, build_report
+from profiling.reports import save_report
+
+PROFILING_SECRET = os.getenv("PROFILING_SECRET", "")
+PROFILING_MAX_PER_MINUTE = int(os.getenv("PROFILING_MAX_PER_MINUTE", "6"))
+PROFILING_INTERVAL_MS = float(os.getenv("PROFILING_INTERVAL_MS", "5"))
+PROFILING_SIGNATURE_MAX_AGE = 300
+
+def sign_request(secret: str, method: str, path: str, timestamp: int) -> str:
+    """Value for the X-Profile-Request header: '<unix timestamp>:<hex HMAC-SHA256 of method, path and timestamp>'"""
+    message = f"{method.upper()}\n{path}\n{timestamp}".encode()
+    return f"{timestamp}:{hmac.new(secret.encode(), message, hashlib.sha256).hexdigest()}"
+
+
+def verify_signature(secret: str, method: str, path: str, header: str, now: float) -> bool:
+    timestamp, _, _ = header.partition(":")
+    try:
+        issued_at = int(timestamp)
+    except ValueError:
+        return False
+    if abs(now - issued_at) > PROFILING_SIGNATURE_MAX_AGE:
+        return False
+    return hmac.compare_digest(header, sign_request(secret, method, path, issued_at))
+
+
+class ProfilingMiddleware:
+    """Profiles single requests that carry a valid signed X-Profile-Request header.
+
+    Install it only when PROFILING_SECRET is set; unsigned requests pay one header lookup.
+    """
+
+    def __init__(self, app: ASGIApp, secret: str = PROFILING_SECRET, max_per_minute: int = PROFILING_MAX_PER_MINUTE):
+        self.app = app
+        self.secret = secret
+        self.max_per_minute = max_per_minute
+        self.interval = PROFILING_INTERVAL_MS / 1000
+        # Only touched from the event loop.
+        self._busy = False
+        self._recent = deque()
+
+    def _admit(self, now: float) -> Optional[str]:
+        if self._busy:
+            return "busy"
+        while self._recent and now - self._recent[0] > 60:
+            self._recent.popleft()
+        if len(self._recent) >= self.max_per_minute:
+            return "rate-limited"
+        self._recent.append(now)
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        header = Headers(scope=scope).get("x-profile-request")
+        if header is None:
+            await self.app(scope, receive, send)
+            return
+
+        now = time.time()
+        refusal = "invalid-signature"
+        if verify_signature(self.secret, scope["method"], scope["path"], header, now):
+            refusal = self._admit(now)
+
+        if refusal is not None:
+            await self.app(scope, receive, self._tag(send, "X-Profile-Skipped", refusal))
+            return
+
+        self._busy = True
+        try:
+            await self._profile(scope, receive, send)
+        finally:
+            self._busy = False
+
+    def _tag(self, send: Send, name: str, value: str) -> Send:
+        async def send_wrapper(message: Message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(raw=message["headers"]).append(name, value)
+            await send(message)
+        return send_wrapper
+
+    async def _profile(self, scope: Scope, receive: Receive, send: Send):
+        profile_id = secrets.token_hex(16)
+        status_code = 500
+        sampler = Sampler(threading.get_ident(), sys._getframe(), self.interval)
+        tagged_send = self._tag(send, "X-Profile-Id", profile_id)
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await tagged_send(message)
+
+        token = active_sampler.set(sampler)
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            sampler.stop()
+            active_sampler.reset(token)
+            report = build_report(sampler, profile_id, scope["method"], scope["path"], status_code)
+            await run_in_threadpool(save_report, report)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Table, Enum, Boolean
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Table, Enum, Boolean, Index, LargeBinary, UniqueConstraint, event
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -20,7 +20,8 @@ event_participants = Table(
     'event_participants',
     Base.metadata,
     Column('event_id', Integer, ForeignKey('events.id'), primary_key=True),
-    Column('user_id', Integer, ForeignKey('users.id'), primary_key=True)
+    Column('user_id', Integer, ForeignKey('users.id'), primary_key=True),
+    Index('ix_event_participants_user_id', 'user_id')
 )
 
 
@@ -33,10 +34,15 @@ class User(Base):
     hashed_password = Column(String, nullable=False)
     is_active = Column(Boolean, default=True, nullable=False)
     
-    reset_token = Column(String, nullable=True)
-    reset_token_expires = Column(DateTime(timezone=True), nullable=True)
+    friends_count = Column(Integer, default=0, server_default="0", nullable=False)
+    active_events_count = Column(Integer, default=0, server_default="0", nullable=False)
+    finished_events_count = Column(Integer, default=0, server_default="0", nullable=False)
+    
+    reset_token_hash = Column(String(64), unique=True, index=True, nullable=True)
+    reset_token_expires = Column(DateTime(timezone=True), index=True, nullable=True)
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
     events = relationship("Event", secondary=event_participants, back_populates="participants")
     expenses_paid = relationship("Expense", foreign_keys="Expense.payer_id", back_populates="payer")
@@ -54,12 +60,23 @@ class User(Base):
     )
 
 
+def canonical_pair(user_id: int, friend_id: int) -> tuple[int, int]:
+    return (user_id, friend_id) if user_id < friend_id else (friend_id, user_id)
+
+
 class Friendship(Base):
     __tablename__ = "friendships"
+    __table_args__ = (
+        UniqueConstraint("low_id", "high_id", name="uq_friendships_pair"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    friend_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    # user_id is the requester and friend_id the addressee; low_id/high_id is the
+    # direction-free key used for pair lookups and uniqueness.
+    user_id = Column(Integer, ForeignKey("users.id"), index=True, nullable=False)
+    friend_id = Column(Integer, ForeignKey("users.id"), index=True, nullable=False)
+    low_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    high_id = Column(Integer, ForeignKey("users.id"), index=True, nullable=False)
     status = Column(Enum(FriendshipStatus), default=FriendshipStatus.PENDING, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -68,6 +85,11 @@ class Friendship(Base):
     friend = relationship("User", foreign_keys=[friend_id], back_populates="friendships_received")
 
 
+@event.listens_for(Friendship, "before_insert")
+def _set_friendship_pair(mapper, connection, friendship):
+    friendship.low_id, friendship.high_id = canonical_pair(friendship.user_id, friendship.friend_id)
+
+
 class Event(Base):
     __tablename__ = "events"
 
@@ -78,6 +100,8 @@ class Event(Base):
     status = Column(Enum(EventStatus), default=EventStatus.ACTIVE, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     finished_at = Column(DateTime(timezone=True), nullable=True)
+    change_seq = Column(Integer, default=0, server_default="0", nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
     participants = relationship("User", secondary=event_participants, back_populates="events")
     expenses = relationship("Expense", back_populates="event", cascade="all, delete-orphan")
@@ -88,11 +112,12 @@ class Expense(Base):
     __tablename__ = "expenses"
 
     id = Column(Integer, primary_key=True, index=True)
-    event_id = Column(Integer, ForeignKey("events.id"), nullable=False)
+    event_id = Column(Integer, ForeignKey("events.id"), index=True, nullable=False)
     payer_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     amount = Column(Float, nullable=False)
     description = Column(String, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
     event = relationship("Event", back_populates="expenses")
     payer = relationship("User", foreign_keys=[payer_id], back_populates="expenses_paid")
@@ -103,9 +128,55 @@ class ExpenseParticipant(Base):
     __tablename__ = "expense_participants"
 
     id = Column(Integer, primary_key=True, index=True)
-    expense_id = Column(Integer, ForeignKey("expenses.id"), nullable=False)
+    expense_id = Column(Integer, ForeignKey("expenses.id"), index=True, nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     amount = Column(Float, nullable=False)
 
     expense = relationship("Expense", back_populates="participants")
     user = relationship("User", back_populates="expense_participations")
+
+
+class EventChange(Base):
+    __tablename__ = "event_changes"
+    __table_args__ = (
+        UniqueConstraint("event_id", "seq", name="uq_event_changes_seq"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    event_id = Column(Integer, ForeignKey("events.id"), nullable=False)
+    seq = Column(Integer, nullable=False)
+    entity = Column(String(32), nullable=False)
+    entity_id = Column(Integer, nullable=False)
+    op = Column(String(16), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class RefreshToken(Base):
+    __tablename__ = "refresh_tokens"
+
+    id = Column(Integer, primary_key=True, index=True)
+    jti = Column(String(64), unique=True, index=True, nullable=False)
+    family_id = Column(String(64), index=True, nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True, nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    used_at = Column(DateTime(timezone=True), nullable=True)
+    revoked_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        UniqueConstraint("user_id", "key", name="uq_idempotency_keys_user_key"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    key = Column(String(128), nullable=False)
+    fingerprint = Column(String(64), nullable=False)
+    # Null until the original request finishes; a row without a status is in flight.
+    status_code = Column(Integer, nullable=True)
+    content_type = Column(String(128), nullable=True)
+    response_body = Column(LargeBinary, nullable=True)
+    locked_at = Column(DateTime(timezone=True), nullable=False)
+    expires_at = Column(DateTime(timezone=True), index=True, nullable=False)
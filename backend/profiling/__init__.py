@@ -0,0 +1,12 @@
+from profiling.sampler import Sampler, build_report, attribute, LAYERS
+from profiling.reports import PROFILING_DIR, save_report, load_report
+
+__all__ = [
+    "Sampler",
+    "build_report",
+    "attribute",
+    "LAYERS",
+    "PROFILING_DIR",
+    "save_report",
+    "load_report"
+]
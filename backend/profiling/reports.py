@@ -0,0 +1,27 @@
+import json
+import os
+import re
+import tempfile
+from typing import Optional
+
+PROFILING_DIR = os.getenv("PROFILING_DIR", os.path.join(tempfile.gettempdir(), "billow-profiles"))
+
+_PROFILE_ID = re.compile(r"^[0-9a-f]{32}$")
+
+
+def save_report(report: dict, directory: str = PROFILING_DIR):
+    os.makedirs(directory, exist_ok=True)
+    fd, temporary = tempfile.mkstemp(dir=directory, prefix=".profile-")
+    with os.fdopen(fd, "w") as handle:
+        json.dump(report, handle)
+    os.replace(temporary, os.path.join(directory, f"{report['id']}.json"))
+
+
+def load_report(profile_id: str, directory: str = PROFILING_DIR) -> Optional[dict]:
+    if not _PROFILE_ID.match(profile_id):
+        return None
+    try:
+        with open(os.path.join(directory, f"{profile_id}.json")) as handle:
+            return json.load(handle)
+    except FileNotFoundError:
+        return None
@@ -0,0 +1,176 @@
+import os
+import sys
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional, Tuple
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LAYERS = ("controller", "service", "repository", "sql", "serialization", "framework")
+
+_LAYER_MARKERS = (
+    ("sql", (f"{os.sep}sqlalchemy{os.sep}", f"{os.sep}sqlite3{os.sep}", f"{os.sep}psycopg", f"{os.sep}asyncpg{os.sep}")),
+    ("serialization", (f"{os.sep}pydantic{os.sep}", f"{os.sep}pydantic_core{os.sep}", f"{os.sep}fastapi{os.sep}encoders.py", f"{os.sep}json{os.sep}")),
+    ("repository", (os.path.join(PROJECT_ROOT, "repository") + os.sep,)),
+    ("service", (os.path.join(PROJECT_ROOT, "service") + os.sep,)),
+    ("controller", (os.path.join(PROJECT_ROOT, "controller") + os.sep,)),
+)
+
+FrameKey = Tuple[str, str, int]
+
+
+def classify(filename: str) -> Optional[str]:
+    for layer, markers in _LAYER_MARKERS:
+        if any(marker in filename for marker in markers):
+            return layer
+    return None
+
+
+def attribute(stack: Tuple[FrameKey, ...]) -> str:
+    """The innermost recognised frame decides the layer, so SQL issued from a repository counts as sql"""
+    for filename, _, _ in reversed(stack):
+        layer = classify(filename)
+        if layer is not None:
+            return layer
+    return "framework"
+
+
+def _worker_run_code():
+    try:
+        from anyio._backends._asyncio import WorkerThread
+    except ImportError:
+        return None
+    return WorkerThread.run.__code__
+
+
+# Threadpool workers run each call as context.run(func) inside this loop, with the caller's copied context.
+_WORKER_RUN_CODE = _worker_run_code()
+
+active_sampler: ContextVar[Optional["Sampler"]] = ContextVar("active_sampler", default=None)
+
+
+def _worker_context(frame):
+    while frame is not None:
+        if frame.f_code is _WORKER_RUN_CODE:
+            return frame.f_locals.get("context")
+        frame = frame.f_back
+    return None
+
+
+def _stack(frame, anchor=None) -> Optional[Tuple[FrameKey, ...]]:
+    frames = []
+    anchored = anchor is None
+    while frame is not None:
+        if frame is anchor:
+            anchored = True
+        code = frame.f_code
+        frames.append((code.co_filename, code.co_name, code.co_firstlineno))
+        frame = frame.f_back
+    if not anchored:
+        return None
+    frames.reverse()
+    return tuple(frames)
+
+
+class Sampler:
+    """Samples the stacks working on one request from a background thread via sys._current_frames()."""
+
+    def __init__(self, loop_thread_id: int, anchor_frame, interval: float):
+        self.loop_thread_id = loop_thread_id
+        self.anchor_frame = anchor_frame
+        self.interval = interval
+        self.stacks: Dict[Tuple[FrameKey, ...], int] = {}
+        self.samples = 0
+        self.started = 0.0
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self):
+        self.started = time.perf_counter()
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.duration = time.perf_counter() - self.started
+
+    def _run(self):
+        # The loop thread only counts while it runs under the request's own middleware frame;
+        # a worker thread only while the call it is running was submitted from the request's context.
+        own_thread_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            self._record(frames.get(self.loop_thread_id), self.anchor_frame)
+            for thread_id, frame in frames.items():
+                if thread_id in (self.loop_thread_id, own_thread_id):
+                    continue
+                if self._owns(frame):
+                    self._record(frame)
+
+    def _owns(self, frame) -> bool:
+        context = _worker_context(frame)
+        return context is not None and context.get(active_sampler) is self
+
+    def _record(self, frame, anchor=None):
+        if frame is None:
+            return
+        stack = _stack(frame, anchor)
+        if stack is None:
+            return
+        self.samples += 1
+        self.stacks[stack] = self.stacks.get(stack, 0) + 1
+
+
+def _frame_label(key: FrameKey) -> str:
+    filename, name, line = key
+    if filename.startswith(PROJECT_ROOT):
+        filename = os.path.relpath(filename, PROJECT_ROOT)
+    else:
+        filename = os.path.basename(filename)
+    return f"{name} ({filename}:{line})"
+
+
+def call_tree(stacks: Dict[Tuple[FrameKey, ...], int], min_share: float = 0.01) -> dict:
+    root = {"frame": "request", "samples": 0, "children": {}}
+    for stack, count in stacks.items():
+        root["samples"] += count
+        node = root
+        for key in stack:
+            node = node["children"].setdefault(key, {"frame": _frame_label(key), "samples": 0, "children": {}})
+            node["samples"] += count
+
+    threshold = max(1, root["samples"] * min_share)
+
+    def prune(node: dict) -> dict:
+        children = sorted(node["children"].values(), key=lambda child: child["samples"], reverse=True)
+        return {
+            "frame": node["frame"],
+            "samples": node["samples"],
+            "children": [prune(child) for child in children if child["samples"] >= threshold]
+        }
+
+    return prune(root)
+
+
+def layer_breakdown(stacks: Dict[Tuple[FrameKey, ...], int]) -> Dict[str, dict]:
+    totals = dict.fromkeys(LAYERS, 0)
+    for stack, count in stacks.items():
+        totals[attribute(stack)] += count
+    samples = sum(totals.values()) or 1
+    return {layer: {"samples": count, "percent": round(100 * count / samples, 1)} for layer, count in totals.items()}
+
+
+def build_report(sampler: Sampler, profile_id: str, method: str, path: str, status_code: int) -> dict:
+    return {
+        "id": profile_id,
+        "method": method,
+        "path": path,
+        "status": status_code,
+        "duration_ms": round(sampler.duration * 1000, 2),
+        "interval_ms": round(sampler.interval * 1000, 2),
+        "samples": sampler.samples,
+        "layers": layer_breakdown(sampler.stacks),
+        "tree": call_tree(sampler.stacks),
+    }
@@ -0,0 +1,42 @@
+import logging
+import os
+from realtime.hub import EventHub
+from realtime.broker import LocalBroker, RedisBroker
+from realtime.stream import event_stream
+
+REALTIME_BROKER_URL = os.getenv("REALTIME_BROKER_URL", "")
+
+logger = logging.getLogger(__name__)
+
+hub = EventHub()
+
+
+def _create_broker():
+    if REALTIME_BROKER_URL.startswith(("redis://", "rediss://")):
+        try:
+            return RedisBroker(REALTIME_BROKER_URL, hub.dispatch)
+        except ImportError:
+            logger.warning("redis is not installed; realtime updates stay within this worker")
+    return LocalBroker(hub.dispatch)
+
+
+broker = _create_broker()
+
+
+def publish(event_id: int, change_type: str, **data):
+    """Broadcast a compact delta to the event's subscribers; call only after the change is committed"""
+    try:
+        broker.publish(event_id, {"type": change_type, "event_id": event_id, **data})
+    except Exception:
+        logger.exception("Failed to publish %s for event %s", change_type, event_id)
+
+
+__all__ = [
+    "EventHub",
+    "LocalBroker",
+    "RedisBroker",
+    "event_stream",
+    "hub",
+    "broker",
+    "publish"
+]
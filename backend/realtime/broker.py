@@ -0,0 +1,70 @@
+import json
+import logging
+import threading
+import time
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+Deliver = Callable[[int, dict], None]
+
+
+class LocalBroker:
+    """Delivers published deltas straight to this process's hub; enough for a single worker."""
+
+    def __init__(self, deliver: Deliver):
+        self._deliver = deliver
+
+    def publish(self, event_id: int, message: dict):
+        self._deliver(event_id, message)
+
+
+class RedisBroker:
+    """Relays deltas through Redis pub/sub so every worker's hub sees them; requires redis."""
+
+    CHANNEL_PREFIX = "billow:event:"
+    RECONNECT_MIN_SECONDS = 0.5
+    RECONNECT_MAX_SECONDS = 30.0
+
+    def __init__(self, url: str, deliver: Deliver):
+        import redis
+
+        self._client = redis.Redis.from_url(url)
+        self._unavailable = (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError)
+        self._deliver = deliver
+        self._listener = threading.Thread(target=self._listen, name="realtime-broker", daemon=True)
+        self._listener.start()
+
+    def publish(self, event_id: int, message: dict):
+        try:
+            self._client.publish(f"{self.CHANNEL_PREFIX}{event_id}", json.dumps(message))
+        except self._unavailable:
+            # Other workers miss this delta until Redis is back, but this worker's own streams still get it.
+            logger.warning("Realtime broker unavailable; delivering event %s locally only", event_id)
+            self._deliver(event_id, message)
+
+    def _listen(self):
+        delay = self.RECONNECT_MIN_SECONDS
+        while True:
+            pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+            try:
+                pubsub.psubscribe(f"{self.CHANNEL_PREFIX}*")
+                delay = self.RECONNECT_MIN_SECONDS
+                for item in pubsub.listen():
+                    self._relay(item)
+            except Exception:
+                logger.exception("Realtime broker subscription lost; reconnecting in %.1fs", delay)
+            finally:
+                try:
+                    pubsub.close()
+                except Exception:
+                    pass
+            time.sleep(delay)
+            delay = min(delay * 2, self.RECONNECT_MAX_SECONDS)
+
+    def _relay(self, item: dict):
+        try:
+            event_id = int(item["channel"].decode()[len(self.CHANNEL_PREFIX):])
+            self._deliver(event_id, json.loads(item["data"]))
+        except Exception:
+            logger.exception("Dropping malformed realtime message")
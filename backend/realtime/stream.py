@@ -0,0 +1,32 @@
+import asyncio
+import json
+import os
+from realtime.hub import EventHub, Subscription
+
+SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+
+
+def _removes_subscriber(message: dict, subscription: Subscription) -> bool:
+    return message["type"] == "participants.changed" and subscription.user_id in message.get("removed", ())
+
+
+async def event_stream(hub: EventHub, event_id: int, user_id: int):
+    """Server-sent events for one event id, with comment heartbeats to keep proxies from timing out"""
+    subscription = hub.subscribe(event_id, user_id)
+    try:
+        yield ": connected\n\n"
+        while True:
+            try:
+                message = await asyncio.wait_for(subscription.queue.get(), timeout=SSE_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if _removes_subscriber(message, subscription):
+                # Membership was only checked when the stream opened; a removed participant stops receiving deltas here.
+                yield f"event: access-revoked\ndata: {json.dumps({'event_id': event_id})}\n\n"
+                return
+            yield f"event: {message['type']}\ndata: {json.dumps(message, default=str)}\n\n"
+            if message["type"] == "resync":
+                return
+    finally:
+        hub.unsubscribe(subscription)
@@ -1,12 +1,22 @@
 from repository.user_repository import UserRepository, FriendshipRepository
 from repository.event_repository import EventRepository
 from repository.expense_repository import ExpenseRepository, ExpenseParticipantRepository
+from repository.token_repository import RefreshTokenRepository
+from repository.friends_graph import FriendsGraph
+from repository.change_repository import EventChangeRepository
+from repository.version_repository import VersionRepository
+from repository.idempotency_repository import IdempotencyRepository
 
 __all__ = [
     "UserRepository",
     "FriendshipRepository",
     "EventRepository",
     "ExpenseRepository",
-    "ExpenseParticipantRepository"
+    "ExpenseParticipantRepository",
+    "RefreshTokenRepository",
+    "FriendsGraph",
+    "EventChangeRepository",
+    "VersionRepository",
+    "IdempotencyRepository"
 ]
 
@@ -0,0 +1,41 @@
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from models.models import Event, EventChange
+
+
+class EventChangeRepository:
+    """Append-only per-event change log that backs delta sync."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def record(self, event_id: int, entity: str, entity_id: int, op: str) -> int:
+        return self.record_many(event_id, entity, [entity_id], op)
+
+    def record_many(self, event_id: int, entity: str, entity_ids: List[int], op: str) -> int:
+        """Append one change per entity id in the current transaction; the caller commits"""
+        if not entity_ids:
+            return self.get_cursor(event_id)
+        # Bumping the counter locks the event row until commit, so sequence numbers become visible in order.
+        last_seq = self.db.execute(
+            update(Event)
+            .where(Event.id == event_id)
+            .values(change_seq=Event.change_seq + len(entity_ids))
+            .returning(Event.change_seq)
+        ).scalar_one()
+        first_seq = last_seq - len(entity_ids) + 1
+        self.db.add_all([
+            EventChange(event_id=event_id, seq=first_seq + offset, entity=entity, entity_id=entity_id, op=op)
+            for offset, entity_id in enumerate(entity_ids)
+        ])
+        return last_seq
+
+    def get_cursor(self, event_id: int) -> Optional[int]:
+        return self.db.query(Event.change_seq).filter(Event.id == event_id).scalar()
+
+    def get_since(self, event_id: int, since: int, limit: int) -> List[EventChange]:
+        return self.db.query(EventChange).filter(
+            EventChange.event_id == event_id,
+            EventChange.seq > since
+        ).order_by(EventChange.seq).limit(limit).all()
@@ -1,6 +1,18 @@
-from sqlalchemy.orm import Session
-from typing import List, Optional
-from models.models import Event, User
+import os
+from sqlalchemy import case, exists, func, select
+from sqlalchemy.orm import Session, joinedload, selectinload
+from typing import FrozenSet, Iterable, List, Optional, Set
+from models.models import Event, EventStatus, Expense, ExpenseParticipant, event_participants
+from cache import TTLCache
+
+PARTICIPANT_CACHE_TTL_SECONDS = float(os.getenv("PARTICIPANT_CACHE_TTL_SECONDS", "10"))
+PARTICIPANT_CACHE_MAX_SIZE = int(os.getenv("PARTICIPANT_CACHE_MAX_SIZE", "2048"))
+
+_participant_ids = TTLCache(maxsize=PARTICIPANT_CACHE_MAX_SIZE, ttl=PARTICIPANT_CACHE_TTL_SECONDS)
+
+
+def invalidate_participants(event_id: int):
+    _participant_ids.invalidate(event_id)
 
 
 class EventRepository:
@@ -19,27 +31,173 @@ class EventRepository:
     def get_all(self, skip: int = 0, limit: int = 100) -> List[Event]:
         return self.db.query(Event).offset(skip).limit(limit).all()
 
-    def get_by_user(self, user_id: int) -> List[Event]:
-        return self.db.query(Event).filter(Event.participants.any(User.id == user_id)).all()
+    def _joined_by_user(self, query, user_id: int):
+        return query.join(
+            event_participants, event_participants.c.event_id == Event.id
+        ).filter(event_participants.c.user_id == user_id)
+
+    def get_by_user(
+        self,
+        user_id: int,
+        status: Optional[EventStatus] = None,
+        skip: int = 0,
+        limit: int = 100
+    ) -> List[Event]:
+        query = self._joined_by_user(self.db.query(Event), user_id).options(
+            selectinload(Event.participants),
+            joinedload(Event.creator)
+        )
+        if status is not None:
+            query = query.filter(Event.status == status)
+        return query.order_by(Event.created_at.desc(), Event.id.desc()).offset(skip).limit(limit).all()
+
+    def get_compact_by_user(
+        self,
+        user_id: int,
+        status: Optional[EventStatus] = None,
+        skip: int = 0,
+        limit: int = 100
+    ):
+        participant_counts = (
+            select(event_participants.c.event_id, func.count().label("participant_count"))
+            .group_by(event_participants.c.event_id)
+            .subquery()
+        )
+        query = self._joined_by_user(
+            self.db.query(
+                Event.id,
+                Event.name,
+                Event.description,
+                Event.created_by,
+                Event.status,
+                Event.created_at,
+                Event.finished_at,
+                participant_counts.c.participant_count
+            ).join(participant_counts, participant_counts.c.event_id == Event.id),
+            user_id
+        )
+        if status is not None:
+            query = query.filter(Event.status == status)
+        return query.order_by(Event.created_at.desc(), Event.id.desc()).offset(skip).limit(limit).all()
     
     def get_by_user_active(self, user_id: int, skip: int = 0, limit: int = 100) -> List[Event]:
-        from models.models import EventStatus
-        return self.db.query(Event).filter(
-            Event.participants.any(User.id == user_id),
+        return self._joined_by_user(self.db.query(Event), user_id).filter(
             Event.status == EventStatus.ACTIVE
         ).offset(skip).limit(limit).all()
 
-    def add_participant(self, event: Event, user: User):
-        if user not in event.participants:
-            event.participants.append(user)
-            self.db.commit()
-            self.db.refresh(event)
+    def get_summaries_by_user(
+        self,
+        user_id: int,
+        status: Optional[EventStatus] = None,
+        skip: int = 0,
+        limit: int = 100
+    ):
+        """Per-event totals and the user's net balance, computed by the database in one statement"""
+        my_event_ids = select(event_participants.c.event_id).where(event_participants.c.user_id == user_id)
+
+        participant_counts = (
+            select(event_participants.c.event_id, func.count().label("participant_count"))
+            .where(event_participants.c.event_id.in_(my_event_ids))
+            .group_by(event_participants.c.event_id)
+            .subquery()
+        )
+        spending = (
+            select(
+                Expense.event_id,
+                func.sum(Expense.amount).label("total_spent"),
+                func.sum(case((Expense.payer_id == user_id, Expense.amount), else_=0)).label("paid")
+            )
+            .where(Expense.event_id.in_(my_event_ids))
+            .group_by(Expense.event_id)
+            .subquery()
+        )
+        shares = (
+            select(Expense.event_id, func.sum(ExpenseParticipant.amount).label("owed"))
+            .join(ExpenseParticipant, ExpenseParticipant.expense_id == Expense.id)
+            .where(ExpenseParticipant.user_id == user_id, Expense.event_id.in_(my_event_ids))
+            .group_by(Expense.event_id)
+            .subquery()
+        )
+
+        query = (
+            select(
+                Event.id,
+                Event.name,
+                Event.status,
+                participant_counts.c.participant_count,
+                func.coalesce(spending.c.total_spent, 0).label("total_spent"),
+                (func.coalesce(spending.c.paid, 0) - func.coalesce(shares.c.owed, 0)).label("net_balance")
+            )
+            .join(participant_counts, participant_counts.c.event_id == Event.id)
+            .outerjoin(spending, spending.c.event_id == Event.id)
+            .outerjoin(shares, shares.c.event_id == Event.id)
+        )
+        if status is not None:
+            query = query.where(Event.status == status)
+        query = query.order_by(Event.created_at.desc(), Event.id.desc()).offset(skip).limit(limit)
+        return self.db.execute(query).all()
+
+    def get_participant_ids(self, event_id: int) -> FrozenSet[int]:
+        participant_ids = _participant_ids.get(event_id)
+        if participant_ids is None:
+            participant_ids = frozenset(self.db.scalars(
+                select(event_participants.c.user_id).where(event_participants.c.event_id == event_id)
+            ).all())
+            _participant_ids.set(event_id, participant_ids)
+        return participant_ids
 
-    def remove_participant(self, event: Event, user: User):
-        if user in event.participants:
-            event.participants.remove(user)
-            self.db.commit()
-            self.db.refresh(event)
+    def is_participant(self, event_id: int, user_id: int) -> bool:
+        cached = _participant_ids.get(event_id)
+        if cached is not None:
+            return user_id in cached
+        return self.db.scalar(select(exists().where(
+            event_participants.c.event_id == event_id,
+            event_participants.c.user_id == user_id
+        )))
+
+    def participants_among(self, event_id: int, user_ids: Iterable[int]) -> Set[int]:
+        """Subset of user_ids that are participants of the event, without loading User rows"""
+        return set(user_ids) & self.get_participant_ids(event_id)
+
+    def _lock_event(self, event_id: int):
+        # Serializes membership writers on the event row; a no-op on SQLite, which locks the whole database.
+        self.db.execute(select(Event.id).where(Event.id == event_id).with_for_update())
+
+    def add_participants(self, event: Event, user_ids: Iterable[int]) -> List[int]:
+        """Insert the users that are not participants yet and return their ids; the caller commits"""
+        requested_ids = set(user_ids)
+        if not requested_ids:
+            return []
+        self._lock_event(event.id)
+        existing_ids = set(self.db.scalars(select(event_participants.c.user_id).where(
+            event_participants.c.event_id == event.id,
+            event_participants.c.user_id.in_(requested_ids)
+        )).all())
+        new_ids = sorted(requested_ids - existing_ids)
+        if new_ids:
+            self.db.execute(
+                event_participants.insert(),
+                [{"event_id": event.id, "user_id": user_id} for user_id in new_ids]
+            )
+        return new_ids
+
+    def remove_participants(self, event: Event, user_ids: Iterable[int]) -> List[int]:
+        """Delete the given memberships and return the ids that were actually removed; the caller commits"""
+        user_ids = set(user_ids)
+        if not user_ids:
+            return []
+        return sorted(self.db.scalars(
+            event_participants.delete().where(
+                event_participants.c.event_id == event.id,
+                event_participants.c.user_id.in_(user_ids)
+            ).returning(event_participants.c.user_id)
+        ).all())
+
+    def save_participants(self, event: Event) -> Event:
+        self.db.commit()
+        invalidate_participants(event.id)
+        self.db.refresh(event)
+        return event
 
     def update(self, event: Event) -> Event:
         self.db.commit()
@@ -47,6 +205,8 @@ class EventRepository:
         return event
 
     def delete(self, event: Event):
+        event_id = event.id
         self.db.delete(event)
         self.db.commit()
+        invalidate_participants(event_id)
 
@@ -1,4 +1,4 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload, selectinload
 from typing import List, Optional
 from models.models import Expense, ExpenseParticipant
 
@@ -13,12 +13,32 @@ class ExpenseRepository:
         self.db.refresh(expense)
         return expense
 
+    def add(self, expense: Expense) -> Expense:
+        """Stage an expense and assign its id without committing; the caller commits"""
+        self.db.add(expense)
+        self.db.flush()
+        return expense
+
     def get_by_id(self, expense_id: int) -> Optional[Expense]:
         return self.db.query(Expense).filter(Expense.id == expense_id).first()
 
     def get_by_event(self, event_id: int) -> List[Expense]:
         return self.db.query(Expense).filter(Expense.event_id == event_id).all()
 
+    def _with_details(self):
+        return self.db.query(Expense).options(
+            joinedload(Expense.payer),
+            selectinload(Expense.participants).joinedload(ExpenseParticipant.user)
+        )
+
+    def get_by_ids_with_details(self, expense_ids: List[int]) -> List[Expense]:
+        if not expense_ids:
+            return []
+        return self._with_details().filter(Expense.id.in_(expense_ids)).order_by(Expense.id).all()
+
+    def get_by_event_with_details(self, event_id: int) -> List[Expense]:
+        return self._with_details().filter(Expense.event_id == event_id).order_by(Expense.id).all()
+
     def update(self, expense: Expense) -> Expense:
         self.db.commit()
         self.db.refresh(expense)
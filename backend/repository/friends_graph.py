@@ -0,0 +1,141 @@
+import os
+from sqlalchemy import func, select, union_all
+from sqlalchemy.orm import Session, joinedload
+from typing import Dict, List, FrozenSet, Tuple
+from models.models import Friendship, FriendshipStatus, User, event_participants
+from cache import TTLCache
+
+FRIEND_ADJACENCY_CACHE_TTL_SECONDS = float(os.getenv("FRIEND_ADJACENCY_CACHE_TTL_SECONDS", "300"))
+FRIEND_ADJACENCY_CACHE_MAX_SIZE = int(os.getenv("FRIEND_ADJACENCY_CACHE_MAX_SIZE", "4096"))
+
+_adjacency = TTLCache(maxsize=FRIEND_ADJACENCY_CACHE_MAX_SIZE, ttl=FRIEND_ADJACENCY_CACHE_TTL_SECONDS)
+
+
+def invalidate_adjacency(*user_ids: int):
+    for user_id in user_ids:
+        _adjacency.invalidate(user_id)
+
+
+class FriendsGraph:
+    """Read side of the friendship graph: lists served with both users joined in a single query."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _with_users(self):
+        return self.db.query(Friendship).options(
+            joinedload(Friendship.user, innerjoin=True),
+            joinedload(Friendship.friend, innerjoin=True)
+        )
+
+    def get_friends(self, user_id: int) -> List[Friendship]:
+        return self._with_users().filter(
+            (Friendship.low_id == user_id) | (Friendship.high_id == user_id),
+            Friendship.status == FriendshipStatus.ACCEPTED
+        ).all()
+
+    def get_pending_requests(self, user_id: int) -> List[Friendship]:
+        return self._with_users().filter(
+            Friendship.friend_id == user_id,
+            Friendship.status == FriendshipStatus.PENDING
+        ).all()
+
+    def get_sent_requests(self, user_id: int) -> List[Friendship]:
+        return self._with_users().filter(
+            Friendship.user_id == user_id,
+            Friendship.status == FriendshipStatus.PENDING
+        ).all()
+
+    def get_friend_ids(self, user_id: int) -> FrozenSet[int]:
+        friend_ids = _adjacency.get(user_id)
+        if friend_ids is not None:
+            return friend_ids
+
+        rows = self.db.query(Friendship.low_id, Friendship.high_id).filter(
+            (Friendship.low_id == user_id) | (Friendship.high_id == user_id),
+            Friendship.status == FriendshipStatus.ACCEPTED
+        ).all()
+        friend_ids = frozenset(row.high_id if row.low_id == user_id else row.low_id for row in rows)
+        _adjacency.set(user_id, friend_ids)
+        return friend_ids
+
+    def _edges(self):
+        accepted = Friendship.status == FriendshipStatus.ACCEPTED
+        return union_all(
+            select(Friendship.low_id.label("a"), Friendship.high_id.label("b")).where(accepted),
+            select(Friendship.high_id.label("a"), Friendship.low_id.label("b")).where(accepted)
+        ).subquery()
+
+    def _connected_ids(self, user_id: int):
+        """Everyone the user is already friends with or has a pending request with"""
+        linked = Friendship.status.in_([FriendshipStatus.ACCEPTED, FriendshipStatus.PENDING])
+        return union_all(
+            select(Friendship.high_id).where(Friendship.low_id == user_id, linked),
+            select(Friendship.low_id).where(Friendship.high_id == user_id, linked)
+        )
+
+    def get_mutual_friend_ids(self, user_id: int, other_id: int) -> FrozenSet[int]:
+        return self.get_friend_ids(user_id) & self.get_friend_ids(other_id)
+
+    def count_friends_of_friends(self, user_id: int, limit: int) -> Dict[int, int]:
+        edges = self._edges()
+        mine = edges.alias("mine")
+        theirs = edges.alias("theirs")
+        mutual = func.count(mine.c.b.distinct()).label("mutual")
+        rows = self.db.execute(
+            select(theirs.c.b.label("candidate_id"), mutual)
+            .join(theirs, theirs.c.a == mine.c.b)
+            .where(
+                mine.c.a == user_id,
+                theirs.c.b != user_id,
+                theirs.c.b.notin_(self._connected_ids(user_id))
+            )
+            .group_by(theirs.c.b)
+            .order_by(mutual.desc())
+            .limit(limit)
+        ).all()
+        return {row.candidate_id: row.mutual for row in rows}
+
+    def count_shared_events(self, user_id: int, limit: int) -> Dict[int, int]:
+        mine = event_participants.alias("mine")
+        theirs = event_participants.alias("theirs")
+        shared = func.count(mine.c.event_id.distinct()).label("shared")
+        rows = self.db.execute(
+            select(theirs.c.user_id.label("candidate_id"), shared)
+            .join(theirs, theirs.c.event_id == mine.c.event_id)
+            .where(
+                mine.c.user_id == user_id,
+                theirs.c.user_id != user_id,
+                theirs.c.user_id.notin_(self._connected_ids(user_id))
+            )
+            .group_by(theirs.c.user_id)
+            .order_by(shared.desc())
+            .limit(limit)
+        ).all()
+        return {row.candidate_id: row.shared for row in rows}
+
+    def get_suggestions(self, user_id: int, limit: int = 20) -> List[Tuple[User, int, int]]:
+        """Rank people the user is not connected to by mutual friends plus events in common"""
+        candidate_pool = limit * 5
+        mutual = self.count_friends_of_friends(user_id, candidate_pool)
+        shared = self.count_shared_events(user_id, candidate_pool)
+
+        ranked = sorted(
+            set(mutual) | set(shared),
+            key=lambda candidate_id: (
+                mutual.get(candidate_id, 0) + shared.get(candidate_id, 0),
+                mutual.get(candidate_id, 0)
+            ),
+            reverse=True
+        )
+        if not ranked:
+            return []
+
+        users = {
+            user.id: user
+            for user in self.db.query(User).filter(User.id.in_(ranked), User.is_active.is_(True)).all()
+        }
+        return [
+            (users[candidate_id], mutual.get(candidate_id, 0), shared.get(candidate_id, 0))
+            for candidate_id in ranked if candidate_id in users
+        ][:limit]
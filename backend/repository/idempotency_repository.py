@@ -0,0 +1,72 @@
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from typing import Optional
+from datetime import datetime
+from models.models import IdempotencyKey
+
+
+class IdempotencyRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get(self, user_id: int, key: str) -> Optional[IdempotencyKey]:
+        return self.db.query(IdempotencyKey).filter(
+            IdempotencyKey.user_id == user_id,
+            IdempotencyKey.key == key
+        ).first()
+
+    def claim(self, record: IdempotencyKey) -> bool:
+        """Insert an in-flight record; False means another request holds the key"""
+        self.db.add(record)
+        try:
+            self.db.commit()
+        except IntegrityError:
+            self.db.rollback()
+            return False
+        return True
+
+    def take_over_stale(self, record: IdempotencyKey, stale_before: datetime) -> bool:
+        """Atomically reuse a key whose record expired or whose original request was abandoned mid-flight"""
+        now = record.locked_at
+        updated = self.db.query(IdempotencyKey).filter(
+            IdempotencyKey.user_id == record.user_id,
+            IdempotencyKey.key == record.key,
+            (IdempotencyKey.expires_at < now) | (
+                IdempotencyKey.status_code.is_(None) & (IdempotencyKey.locked_at < stale_before)
+            )
+        ).update({
+            IdempotencyKey.fingerprint: record.fingerprint,
+            IdempotencyKey.status_code: None,
+            IdempotencyKey.content_type: None,
+            IdempotencyKey.response_body: None,
+            IdempotencyKey.locked_at: now,
+            IdempotencyKey.expires_at: record.expires_at
+        }, synchronize_session=False)
+        self.db.commit()
+        return updated == 1
+
+    def complete(self, user_id: int, key: str, status_code: int, content_type: Optional[str], body: bytes):
+        self.db.query(IdempotencyKey).filter(
+            IdempotencyKey.user_id == user_id,
+            IdempotencyKey.key == key
+        ).update({
+            IdempotencyKey.status_code: status_code,
+            IdempotencyKey.content_type: content_type,
+            IdempotencyKey.response_body: body
+        }, synchronize_session=False)
+        self.db.commit()
+
+    def release(self, user_id: int, key: str):
+        self.db.query(IdempotencyKey).filter(
+            IdempotencyKey.user_id == user_id,
+            IdempotencyKey.key == key,
+            IdempotencyKey.status_code.is_(None)
+        ).delete(synchronize_session=False)
+        self.db.commit()
+
+    def delete_expired(self, now: datetime) -> int:
+        deleted = self.db.query(IdempotencyKey).filter(
+            IdempotencyKey.expires_at < now
+        ).delete(synchronize_session=False)
+        self.db.commit()
+        return deleted
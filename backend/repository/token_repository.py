@@ -0,0 +1,57 @@
+from sqlalchemy.orm import Session
+from typing import Optional, Set
+from datetime import datetime
+from models.models import RefreshToken
+
+
+class RefreshTokenRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def create(self, token: RefreshToken) -> RefreshToken:
+        self.db.add(token)
+        self.db.commit()
+        self.db.refresh(token)
+        return token
+
+    def get_by_jti(self, jti: str) -> Optional[RefreshToken]:
+        return self.db.query(RefreshToken).filter(RefreshToken.jti == jti).first()
+
+    def mark_used(self, jti: str, used_at: datetime) -> bool:
+        """Atomically consume a refresh token; False means it was already used or revoked"""
+        updated = self.db.query(RefreshToken).filter(
+            RefreshToken.jti == jti,
+            RefreshToken.used_at.is_(None),
+            RefreshToken.revoked_at.is_(None)
+        ).update({RefreshToken.used_at: used_at}, synchronize_session=False)
+        self.db.commit()
+        return updated == 1
+
+    def revoke_family(self, family_id: str, revoked_at: datetime):
+        self.db.query(RefreshToken).filter(
+            RefreshToken.family_id == family_id,
+            RefreshToken.revoked_at.is_(None)
+        ).update({RefreshToken.revoked_at: revoked_at}, synchronize_session=False)
+        self.db.commit()
+
+    def revoke_user_families(self, user_id: int, revoked_at: datetime, keep_family_id: Optional[str] = None) -> Set[str]:
+        """Revoke every live refresh-token family of the user except keep_family_id and return their ids"""
+        query = self.db.query(RefreshToken).filter(
+            RefreshToken.user_id == user_id,
+            RefreshToken.revoked_at.is_(None),
+            RefreshToken.expires_at > revoked_at
+        )
+        if keep_family_id is not None:
+            query = query.filter(RefreshToken.family_id != keep_family_id)
+        family_ids = {row.family_id for row in query.with_entities(RefreshToken.family_id).distinct().all()}
+        if family_ids:
+            query.update({RefreshToken.revoked_at: revoked_at}, synchronize_session=False)
+            self.db.commit()
+        return family_ids
+
+    def get_revoked_family_ids(self, now: datetime) -> Set[str]:
+        rows = self.db.query(RefreshToken.family_id).filter(
+            RefreshToken.revoked_at.isnot(None),
+            RefreshToken.expires_at > now
+        ).distinct().all()
+        return {row.family_id for row in rows}
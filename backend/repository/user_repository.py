@@ -1,6 +1,41 @@
-from sqlalchemy.orm import Session
+import os
+from sqlalchemy import event
+from sqlalchemy.orm import Session, make_transient_to_detached
 from typing import Optional, List
-from models.models import User, Friendship, FriendshipStatus
+from datetime import datetime
+from models.models import User, Friendship, FriendshipStatus, canonical_pair
+from cache import TTLCache
+
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "30"))
+USER_CACHE_MAX_SIZE = int(os.getenv("USER_CACHE_MAX_SIZE", "4096"))
+
+_active_users = TTLCache(maxsize=USER_CACHE_MAX_SIZE, ttl=USER_CACHE_TTL_SECONDS)
+
+
+def _detached_snapshot(user: User) -> User:
+    snapshot = User(**{column.key: getattr(user, column.key) for column in User.__table__.columns})
+    make_transient_to_detached(snapshot)
+    return snapshot
+
+
+def invalidate_cached_user(user_id: int):
+    _active_users.invalidate(user_id)
+
+
+def _invalidate_after_commit(db: Session, user_ids: List[int]):
+    db.info.setdefault("stale_user_ids", set()).update(user_ids)
+
+
+@event.listens_for(Session, "after_commit")
+def _flush_stale_users(session: Session):
+    # Evicting only once the new values are visible keeps a concurrent read from re-caching the old row.
+    for user_id in session.info.pop("stale_user_ids", ()):
+        invalidate_cached_user(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_stale_users(session: Session):
+    session.info.pop("stale_user_ids", None)
 
 
 class UserRepository:
@@ -16,14 +51,50 @@ class UserRepository:
     def get_by_id(self, user_id: int) -> Optional[User]:
         return self.db.query(User).filter(User.id == user_id).first()
 
+    def get_active_by_id_cached(self, user_id: int) -> Optional[User]:
+        """Return an active user attached to this session, served from the shared cache when possible"""
+        cached = _active_users.get(user_id)
+        if cached is not None:
+            return self.db.merge(cached, load=False)
+
+        user = self.get_by_id(user_id)
+        if user is not None and user.is_active:
+            _active_users.set(user_id, _detached_snapshot(user))
+        return user
+
+    def get_by_ids(self, user_ids: List[int]) -> List[User]:
+        if not user_ids:
+            return []
+        return self.db.query(User).filter(User.id.in_(user_ids)).all()
+
+    def adjust_counters(self, user_ids: List[int], **deltas: int):
+        """Add deltas to counter columns in the current transaction; the caller commits"""
+        if not user_ids:
+            return
+        self.db.query(User).filter(User.id.in_(user_ids)).update(
+            {getattr(User, name): getattr(User, name) + delta for name, delta in deltas.items()},
+            synchronize_session=False
+        )
+        _invalidate_after_commit(self.db, user_ids)
+
     def get_by_username(self, username: str) -> Optional[User]:
         return self.db.query(User).filter(User.username == username).first()
 
     def get_by_email(self, email: str) -> Optional[User]:
         return self.db.query(User).filter(User.email == email).first()
 
-    def get_by_reset_token(self, token: str) -> Optional[User]:
-        return self.db.query(User).filter(User.reset_token == token).first()
+    def get_by_reset_token_hash(self, token_hash: str) -> Optional[User]:
+        return self.db.query(User).filter(User.reset_token_hash == token_hash).first()
+
+    def clear_expired_reset_tokens(self, now: datetime) -> int:
+        cleared = self.db.query(User).filter(
+            User.reset_token_expires < now
+        ).update({
+            User.reset_token_hash: None,
+            User.reset_token_expires: None
+        }, synchronize_session=False)
+        self.db.commit()
+        return cleared
 
     def get_all(self, skip: int = 0, limit: int = 100) -> List[User]:
         return self.db.query(User).offset(skip).limit(limit).all()
@@ -35,12 +106,15 @@ class UserRepository:
 
     def update(self, user: User) -> User:
         self.db.commit()
+        invalidate_cached_user(user.id)
         self.db.refresh(user)
         return user
 
     def delete(self, user: User):
+        user_id = user.id
         self.db.delete(user)
         self.db.commit()
+        invalidate_cached_user(user_id)
 
 
 class FriendshipRepository:
@@ -53,15 +127,33 @@ class FriendshipRepository:
         self.db.refresh(friendship)
         return friendship
 
+    def get_by_id(self, friendship_id: int) -> Optional[Friendship]:
+        return self.db.query(Friendship).filter(Friendship.id == friendship_id).first()
+
+    def get_by_id_for_user(self, friendship_id: int, user_id: int) -> Optional[Friendship]:
+        return self.db.query(Friendship).filter(
+            Friendship.id == friendship_id,
+            (Friendship.low_id == user_id) | (Friendship.high_id == user_id)
+        ).first()
+
     def get_by_ids(self, user_id: int, friend_id: int) -> Optional[Friendship]:
+        low_id, high_id = canonical_pair(user_id, friend_id)
         return self.db.query(Friendship).filter(
-            ((Friendship.user_id == user_id) & (Friendship.friend_id == friend_id)) |
-            ((Friendship.user_id == friend_id) & (Friendship.friend_id == user_id))
+            Friendship.low_id == low_id,
+            Friendship.high_id == high_id
         ).first()
 
+    def get_with_counterparts(self, user_id: int, other_ids: List[int]) -> List[Friendship]:
+        if not other_ids:
+            return []
+        return self.db.query(Friendship).filter(
+            ((Friendship.low_id == user_id) & Friendship.high_id.in_(other_ids)) |
+            ((Friendship.high_id == user_id) & Friendship.low_id.in_(other_ids))
+        ).all()
+
     def get_friendships_by_user(self, user_id: int, status: Optional[FriendshipStatus] = None) -> List[Friendship]:
         query = self.db.query(Friendship).filter(
-            (Friendship.user_id == user_id) | (Friendship.friend_id == user_id)
+            (Friendship.low_id == user_id) | (Friendship.high_id == user_id)
         )
         if status:
             query = query.filter(Friendship.status == status)
@@ -91,7 +183,7 @@ class FriendshipRepository:
     def count_friends(self, user_id: int) -> int:
         """Count accepted friendships for a user"""
         return self.db.query(Friendship).filter(
-            ((Friendship.user_id == user_id) | (Friendship.friend_id == user_id)),
+            ((Friendship.low_id == user_id) | (Friendship.high_id == user_id)),
             Friendship.status == FriendshipStatus.ACCEPTED
         ).count()
 
@@ -0,0 +1,59 @@
+from sqlalchemy import func, or_, select, union
+from sqlalchemy.orm import Session
+from typing import Optional
+from models.models import Event, Expense, ExpenseParticipant, Friendship, FriendshipStatus, User, event_participants
+
+
+def _user_changed_at():
+    return func.max(func.coalesce(User.updated_at, User.created_at))
+
+
+class VersionRepository:
+    """Cheap version probes for conditional GETs; none of them load the object graph."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _users_changed_at(self, user_ids):
+        return select(_user_changed_at()).where(User.id.in_(user_ids)).scalar_subquery()
+
+    def event_version(self, event_id: int) -> Optional[tuple]:
+        participant_ids = select(event_participants.c.user_id).where(event_participants.c.event_id == event_id)
+        return self.db.execute(
+            select(
+                Event.change_seq,
+                func.coalesce(Event.updated_at, Event.created_at),
+                self._users_changed_at(participant_ids)
+            ).where(Event.id == event_id)
+        ).first()
+
+    def event_expenses_version(self, event_id: int) -> Optional[tuple]:
+        referenced_ids = union(
+            select(Expense.payer_id).where(Expense.event_id == event_id),
+            select(ExpenseParticipant.user_id)
+            .join(Expense, Expense.id == ExpenseParticipant.expense_id)
+            .where(Expense.event_id == event_id)
+        )
+        return self.db.execute(
+            select(Event.change_seq, self._users_changed_at(referenced_ids)).where(Event.id == event_id)
+        ).first()
+
+    def user_version(self, user_id: int) -> Optional[tuple]:
+        return self.db.execute(
+            select(func.coalesce(User.updated_at, User.created_at)).where(User.id == user_id)
+        ).first()
+
+    def friends_version(self, user_id: int) -> tuple:
+        involves_user = or_(Friendship.low_id == user_id, Friendship.high_id == user_id)
+        accepted = Friendship.status == FriendshipStatus.ACCEPTED
+        friend_ids = union(
+            select(Friendship.low_id).where(involves_user, accepted),
+            select(Friendship.high_id).where(involves_user, accepted)
+        )
+        return self.db.execute(
+            select(
+                func.count(Friendship.id),
+                func.max(func.coalesce(Friendship.updated_at, Friendship.created_at)),
+                self._users_changed_at(friend_ids)
+            ).where(involves_user, accepted)
+        ).one()
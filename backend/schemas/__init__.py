@@ -3,6 +3,8 @@ from schemas.user_schemas import (
     UserCreate,
     UserLogin,
     UserResponse,
+    UserProfileResponse,
+    IncludedUsers,
     UserUpdate,
     PasswordChange,
     PasswordResetRequest,
@@ -12,13 +14,23 @@ from schemas.user_schemas import (
 from schemas.friendship_schemas import (
     FriendshipBase,
     FriendshipResponse,
-    FriendshipRequestResponse
+    FriendshipRequestResponse,
+    FriendSuggestion,
+    MutualFriendsResponse,
+    FriendshipStatusResponse,
+    FriendshipStatusQuery,
+    UserSearchResult
 )
 from schemas.event_schemas import (
     EventBase,
     EventCreate,
     EventResponse,
-    EventUpdate
+    EventCompactResponse,
+    EventUpdate,
+    EventSummary,
+    NormalizedEvent,
+    NormalizedEventList,
+    ParticipantIds
 )
 from schemas.expense_schemas import (
     ExpenseParticipantCreate,
@@ -27,16 +39,25 @@ from schemas.expense_schemas import (
     ExpenseCreate,
     ExpenseUpdate,
     ExpenseResponse,
+    ExpenseSplit,
+    NormalizedExpense,
+    NormalizedExpenseList,
     BalanceEntry,
     EventBalance
 )
+from schemas.sync_schemas import EventChanges
 
 __all__ = [
-    "UserBase", "UserCreate", "UserLogin", "UserResponse", "UserUpdate",
+    "UserBase", "UserCreate", "UserLogin", "UserResponse", "UserProfileResponse", "IncludedUsers", "UserUpdate",
     "PasswordChange", "PasswordResetRequest", "PasswordReset", "TokenResponse",
     "FriendshipBase", "FriendshipResponse", "FriendshipRequestResponse",
-    "EventBase", "EventCreate", "EventResponse", "EventUpdate",
+    "FriendSuggestion", "MutualFriendsResponse", "FriendshipStatusResponse",
+    "FriendshipStatusQuery", "UserSearchResult",
+    "EventBase", "EventCreate", "EventResponse", "EventCompactResponse", "EventUpdate",
+    "EventSummary", "NormalizedEvent", "NormalizedEventList", "ParticipantIds",
     "ExpenseParticipantCreate", "ExpenseParticipantResponse", "ExpenseBase",
-    "ExpenseCreate", "ExpenseResponse", "BalanceEntry", "EventBalance"
+    "ExpenseCreate", "ExpenseResponse", "ExpenseSplit", "NormalizedExpense", "NormalizedExpenseList",
+    "BalanceEntry", "EventBalance",
+    "EventChanges"
 ]
 
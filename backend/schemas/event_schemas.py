@@ -1,7 +1,7 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import datetime
-from schemas.user_schemas import UserResponse
+from schemas.user_schemas import UserResponse, IncludedUsers
 
 
 class EventBase(BaseModel):
@@ -26,7 +26,46 @@ class EventResponse(EventBase):
         from_attributes = True
 
 
+class EventCompactResponse(EventBase):
+    id: int
+    created_by: int
+    status: str
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+    participant_count: int
+
+    class Config:
+        from_attributes = True
+
+
+class NormalizedEvent(EventBase):
+    id: int
+    created_by: int
+    status: str
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+    participant_ids: List[int] = []
+
+
+class NormalizedEventList(BaseModel):
+    data: List[NormalizedEvent] = []
+    included: IncludedUsers
+
+
+class ParticipantIds(BaseModel):
+    user_ids: List[int] = Field(min_length=1, max_length=200)
+
+
 class EventUpdate(BaseModel):
     name: Optional[str] = None
     description: Optional[str] = None
 
+
+
+class EventSummary(BaseModel):
+    id: int
+    name: str
+    status: str
+    participant_count: int
+    total_spent: float
+    net_balance: float
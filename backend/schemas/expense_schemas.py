@@ -1,7 +1,7 @@
 from pydantic import BaseModel
 from typing import Optional, List
 from datetime import datetime
-from schemas.user_schemas import UserResponse
+from schemas.user_schemas import UserResponse, IncludedUsers
 
 
 class ExpenseParticipantCreate(BaseModel):
@@ -49,6 +49,33 @@ class ExpenseResponse(ExpenseBase):
         from_attributes = True
 
 
+class ExpenseSplit(BaseModel):
+    id: int
+    user_id: int
+    amount: float
+
+    class Config:
+        from_attributes = True
+
+
+class NormalizedExpense(BaseModel):
+    id: int
+    event_id: int
+    payer_id: int
+    amount: float
+    description: Optional[str] = None
+    created_at: datetime
+    participants: List[ExpenseSplit] = []
+
+    class Config:
+        from_attributes = True
+
+
+class NormalizedExpenseList(BaseModel):
+    data: List[NormalizedExpense] = []
+    included: IncludedUsers
+
+
 class BalanceEntry(BaseModel):
     from_user_id: int
     to_user_id: int
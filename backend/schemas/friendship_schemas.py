@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import Optional, List
 from datetime import datetime
 from schemas.user_schemas import UserResponse
 
@@ -32,3 +32,29 @@ class FriendshipRequestResponse(BaseModel):
     class Config:
         from_attributes = True
 
+
+
+class FriendSuggestion(BaseModel):
+    user: UserResponse
+    mutual_friends: int
+    shared_events: int
+
+
+class MutualFriendsResponse(BaseModel):
+    user_id: int
+    count: int
+    friends: List[UserResponse] = []
+
+
+class FriendshipStatusResponse(BaseModel):
+    status: str
+    friendship_id: Optional[int] = None
+    is_sender: Optional[bool] = None
+
+
+class FriendshipStatusQuery(BaseModel):
+    user_ids: List[int] = Field(default_factory=list, max_length=100)
+
+
+class UserSearchResult(UserResponse):
+    friendship: Optional[FriendshipStatusResponse] = None
@@ -0,0 +1,15 @@
+from pydantic import BaseModel
+from typing import List
+from schemas.user_schemas import UserResponse
+from schemas.expense_schemas import ExpenseResponse
+
+
+class EventChanges(BaseModel):
+    event_id: int
+    cursor: int
+    has_more: bool
+    status: str
+    expenses: List[ExpenseResponse] = []
+    deleted_expense_ids: List[int] = []
+    added_participants: List[UserResponse] = []
+    removed_participant_ids: List[int] = []
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, field_validator
-from typing import Optional
+from typing import Dict, Optional
 from datetime import datetime
 import re
 
@@ -27,6 +27,8 @@ class UserLogin(BaseModel):
 
 
 class UserResponse(UserBase):
+    # Stored addresses were validated on the way in; re-checking each nested user dominates list responses.
+    email: str
     id: int
     is_active: bool
     created_at: datetime
@@ -36,6 +38,15 @@ class UserResponse(UserBase):
         from_attributes = True
 
 
+class IncludedUsers(BaseModel):
+    users: Dict[int, UserResponse] = {}
+
+
+class UserProfileResponse(UserResponse):
+    active_events_count: int = 0
+    finished_events_count: int = 0
+
+
 class UserUpdate(BaseModel):
     username: Optional[str] = None
     email: Optional[EmailStr] = None
@@ -0,0 +1,111 @@
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+os.environ.setdefault("DB_URL", "sqlite://")
+
+from fastapi import FastAPI, status
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from auth.jwt_handler import create_access_token, decode_access_token
+from auth.middleware import JWTAuthMiddleware
+
+REQUESTS = int(os.getenv("BENCH_REQUESTS", "20000"))
+
+
+class LegacyJWTAuthMiddleware(BaseHTTPMiddleware):
+    """The BaseHTTPMiddleware implementation JWTAuthMiddleware replaced, kept for comparison."""
+
+    EXCLUDED_PATHS = JWTAuthMiddleware.EXCLUDED_PATHS
+
+    async def dispatch(self, request: Request, call_next):
+        if request.url.path in self.EXCLUDED_PATHS or request.url.path.startswith("/docs") or request.url.path.startswith("/openapi.json"):
+            return await call_next(request)
+
+        if request.method == "OPTIONS":
+            return await call_next(request)
+
+        authorization = request.headers.get("Authorization")
+        if not authorization:
+            return JSONResponse(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                content={"detail": "Not authenticated"},
+                headers={"WWW-Authenticate": "Bearer"}
+            )
+
+        parts = authorization.split()
+        if len(parts) != 2 or parts[0].lower() != "bearer":
+            return JSONResponse(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                content={"detail": "Invalid authentication header format"},
+                headers={"WWW-Authenticate": "Bearer"}
+            )
+
+        payload = decode_access_token(parts[1])
+        if payload is None:
+            return JSONResponse(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                content={"detail": "Could not validate credentials"},
+                headers={"WWW-Authenticate": "Bearer"}
+            )
+
+        request.state.user_id = int(payload["sub"])
+        return await call_next(request)
+
+
+def build_app(middleware_class) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(middleware_class)
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    return app
+
+
+async def run(app, headers) -> float:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/ping",
+        "raw_path": b"/ping",
+        "root_path": "",
+        "query_string": b"",
+        "headers": headers,
+        "client": ("127.0.0.1", 50000),
+        "server": ("testserver", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    for _ in range(200):
+        await app(dict(scope), receive, send)
+
+    started = time.perf_counter()
+    for _ in range(REQUESTS):
+        await app(dict(scope), receive, send)
+    return REQUESTS / (time.perf_counter() - started)
+
+
+if __name__ == "__main__":
+    token = create_access_token(data={"sub": 1})
+    headers = [(b"authorization", f"Bearer {token}".encode())]
+
+    for name, middleware_class in (("BaseHTTPMiddleware", LegacyJWTAuthMiddleware), ("pure ASGI", JWTAuthMiddleware)):
+        rps = asyncio.run(run(build_app(middleware_class), headers))
+        print(f"{name:<20} {rps:>10.0f} req/s")
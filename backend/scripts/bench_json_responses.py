@@ -0,0 +1,158 @@
+import asyncio
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+os.environ.setdefault("DB_URL", "sqlite://")
+
+from datetime import datetime
+from typing import List, Optional
+from fastapi import FastAPI, Response
+from pydantic import BaseModel, EmailStr
+from database.config import Base, SessionLocal, engine
+from models.models import User, Event, Expense, ExpenseParticipant
+from repository.expense_repository import ExpenseRepository
+from schemas.expense_schemas import ExpenseResponse, NormalizedExpenseList
+from service.expense_service import ExpenseService
+from controller.shaping import shaped_response
+
+EXPENSES = int(os.getenv("BENCH_EXPENSES", "1000"))
+USERS = int(os.getenv("BENCH_USERS", "20"))
+ROUNDS = int(os.getenv("BENCH_ROUNDS", "20"))
+
+
+class LegacyUserResponse(BaseModel):
+    """UserResponse as it was before stored emails stopped being re-validated, kept for comparison."""
+
+    username: str
+    email: EmailStr
+    id: int
+    is_active: bool
+    created_at: datetime
+    friends_count: Optional[int] = None
+
+    class Config:
+        from_attributes = True
+
+
+class LegacyExpenseParticipantResponse(BaseModel):
+    id: int
+    user_id: int
+    amount: float
+    user: LegacyUserResponse
+
+    class Config:
+        from_attributes = True
+
+
+class LegacyExpenseResponse(BaseModel):
+    amount: float
+    description: Optional[str] = None
+    id: int
+    event_id: int
+    payer_id: int
+    created_at: datetime
+    payer: LegacyUserResponse
+    participants: List[LegacyExpenseParticipantResponse] = []
+
+    class Config:
+        from_attributes = True
+
+
+def seed(db) -> int:
+    users = [User(username=f"user{i}", email=f"user{i}@example.com", hashed_password="x") for i in range(USERS)]
+    event = Event(name="Benchmark", created_by=1, participants=users)
+    db.add(event)
+    db.flush()
+    for i in range(EXPENSES):
+        split = [users[(i + offset) % USERS] for offset in range(3)]
+        db.add(Expense(
+            event_id=event.id,
+            payer_id=split[0].id,
+            amount=30.0,
+            description=f"Expense {i}",
+            participants=[ExpenseParticipant(user_id=user.id, amount=10.0) for user in split]
+        ))
+    db.commit()
+    return event.id
+
+
+def build_app(expenses, normalized) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/legacy", response_model=List[LegacyExpenseResponse])
+    async def legacy():
+        return expenses
+
+    @app.get("/current", response_model=List[ExpenseResponse])
+    async def current():
+        return expenses
+
+    @app.get("/normalized", response_model=NormalizedExpenseList)
+    async def normalized_shape(response: Response):
+        return shaped_response(NormalizedExpenseList, normalized, response, envelope=True)
+
+    return app
+
+
+async def call(app, path: str) -> bytes:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [],
+        "client": ("127.0.0.1", 50000),
+        "server": ("testserver", 80),
+    }
+    body = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            body.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return b"".join(body)
+
+
+async def run(app, path: str) -> tuple[float, bytes]:
+    body = await call(app, path)
+    started = time.perf_counter()
+    for _ in range(ROUNDS):
+        await call(app, path)
+    return (time.perf_counter() - started) / ROUNDS * 1000, body
+
+
+if __name__ == "__main__":
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    expenses = ExpenseRepository(db).get_by_event_with_details(seed(db))
+    app = build_app(expenses, ExpenseService(db).normalize_expenses(expenses))
+
+    legacy_ms, legacy_body = asyncio.run(run(app, "/legacy"))
+    current_ms, current_body = asyncio.run(run(app, "/current"))
+    normalized_ms, normalized_body = asyncio.run(run(app, "/normalized"))
+    assert json.loads(legacy_body) == json.loads(current_body), "both schemas must produce the same payload"
+
+    print(f"{len(expenses)} expenses, {len(current_body) / 1024:.0f} KiB per response")
+    print(f"{'EmailStr on output':<20} {legacy_ms:>8.1f} ms/request")
+    print(f"{'trusted str':<20} {current_ms:>8.1f} ms/request ({legacy_ms / current_ms:.1f}x)")
+    print(
+        f"{'normalized shape':<20} {normalized_ms:>8.1f} ms/request ({legacy_ms / normalized_ms:.1f}x), "
+        f"{len(normalized_body) / 1024:.0f} KiB per response"
+    )
+    db.close()
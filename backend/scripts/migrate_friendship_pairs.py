@@ -0,0 +1,95 @@
+import argparse
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import case, func, inspect, select, text
+from database.config import engine
+from models.models import Friendship, FriendshipStatus
+from scripts.reconcile_user_counters import reconcile
+
+# Which row survives when a pair was stored in both directions: the most advanced status, then the oldest.
+STATUS_RANK = {FriendshipStatus.ACCEPTED: 0, FriendshipStatus.PENDING: 1, FriendshipStatus.REJECTED: 2}
+
+
+def add_pair_columns(connection) -> bool:
+    columns = {column["name"] for column in inspect(connection).get_columns("friendships")}
+    missing = [name for name in ("low_id", "high_id") if name not in columns]
+    for name in missing:
+        connection.execute(text(f"ALTER TABLE friendships ADD COLUMN {name} INTEGER REFERENCES users(id)"))
+    return bool(missing)
+
+
+# Derived from user_id/friend_id so duplicates can be found before the pair columns exist.
+LOW_ID = case((Friendship.user_id < Friendship.friend_id, Friendship.user_id), else_=Friendship.friend_id)
+HIGH_ID = case((Friendship.user_id < Friendship.friend_id, Friendship.friend_id), else_=Friendship.user_id)
+
+
+def backfill_pairs(connection) -> int:
+    return connection.execute(
+        Friendship.__table__.update()
+        .where((Friendship.low_id.is_(None)) | (Friendship.high_id.is_(None)))
+        .values(low_id=LOW_ID, high_id=HIGH_ID)
+    ).rowcount
+
+
+def duplicate_ids(connection) -> list:
+    duplicated = select(LOW_ID.label("low"), HIGH_ID.label("high")).group_by(LOW_ID, HIGH_ID).having(func.count() > 1).subquery()
+    rows = connection.execute(
+        select(Friendship.id, LOW_ID.label("low"), HIGH_ID.label("high"), Friendship.status)
+        .join(duplicated, (duplicated.c.low == LOW_ID) & (duplicated.c.high == HIGH_ID))
+    ).all()
+
+    by_pair = {}
+    for row in rows:
+        by_pair.setdefault((row.low, row.high), []).append(row)
+    doomed = []
+    for pair_rows in by_pair.values():
+        pair_rows.sort(key=lambda row: (STATUS_RANK[row.status], row.id))
+        doomed += [row.id for row in pair_rows[1:]]
+    return doomed
+
+
+def add_constraints(connection):
+    connection.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS uq_friendships_pair ON friendships (low_id, high_id)"))
+    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_friendships_high_id ON friendships (high_id)"))
+    if connection.dialect.name == "postgresql":
+        connection.execute(text("ALTER TABLE friendships ALTER COLUMN low_id SET NOT NULL"))
+        connection.execute(text("ALTER TABLE friendships ALTER COLUMN high_id SET NOT NULL"))
+
+
+def migrate(apply: bool) -> int:
+    """Bring a friendships table created before the canonical pair key up to the current model"""
+    with engine.connect() as connection:
+        doomed = duplicate_ids(connection)
+        for friendship_id in doomed:
+            print(f"friendship {friendship_id} duplicates an existing pair")
+        if not apply:
+            return len(doomed)
+        if add_pair_columns(connection):
+            print("Added low_id/high_id columns.")
+        print(f"Backfilled {backfill_pairs(connection)} row(s).")
+        if doomed:
+            connection.execute(Friendship.__table__.delete().where(Friendship.id.in_(doomed)))
+        add_constraints(connection)
+        connection.commit()
+    if doomed:
+        # Dropped duplicates may have been counted in friends_count.
+        reconcile(fix=True)
+    return len(doomed)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill friendship pair keys and drop A->B / B->A duplicates")
+    parser.add_argument("--apply", action="store_true", help="delete duplicates and create the unique pair index")
+    args = parser.parse_args()
+
+    duplicates = migrate(args.apply)
+    if args.apply:
+        print(f"Removed {duplicates} duplicate friendship(s); pair index in place.")
+    elif duplicates:
+        print(f"{duplicates} duplicate friendship(s) found; rerun with --apply to remove them and add the index.")
+    else:
+        print("No duplicate pairs; rerun with --apply to add the index.")
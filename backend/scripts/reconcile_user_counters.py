@@ -0,0 +1,82 @@
+import argparse
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import func, select, union_all
+from database.config import SessionLocal
+from models.models import User, Friendship, FriendshipStatus, Event, EventStatus, event_participants
+from repository.user_repository import invalidate_cached_user
+
+COUNTERS = ("friends_count", "active_events_count", "finished_events_count")
+
+
+def expected_counters(db) -> dict:
+    accepted = Friendship.status == FriendshipStatus.ACCEPTED
+    friend_ends = union_all(
+        select(Friendship.low_id.label("user_id")).where(accepted),
+        select(Friendship.high_id.label("user_id")).where(accepted)
+    ).subquery()
+    friends = dict(db.execute(
+        select(friend_ends.c.user_id, func.count()).group_by(friend_ends.c.user_id)
+    ).all())
+
+    events = {}
+    for user_id, event_status, count in db.execute(
+        select(event_participants.c.user_id, Event.status, func.count())
+        .join(Event, Event.id == event_participants.c.event_id)
+        .group_by(event_participants.c.user_id, Event.status)
+    ).all():
+        events[(user_id, event_status)] = count
+
+    expected = {}
+    for (user_id,) in db.execute(select(User.id)).all():
+        expected[user_id] = {
+            "friends_count": friends.get(user_id, 0),
+            "active_events_count": events.get((user_id, EventStatus.ACTIVE), 0),
+            "finished_events_count": events.get((user_id, EventStatus.FINISHED), 0),
+        }
+    return expected
+
+
+def reconcile(fix: bool) -> int:
+    db = SessionLocal()
+    try:
+        expected = expected_counters(db)
+        mismatches = 0
+        for user in db.query(User).all():
+            wanted = expected[user.id]
+            drift = {name: (getattr(user, name), wanted[name]) for name in COUNTERS if getattr(user, name) != wanted[name]}
+            if not drift:
+                continue
+            mismatches += 1
+            print(f"user {user.id} ({user.username}): " + ", ".join(
+                f"{name} {stored} -> {actual}" for name, (stored, actual) in drift.items()
+            ))
+            if fix:
+                for name, (_, actual) in drift.items():
+                    setattr(user, name, actual)
+        if fix and mismatches:
+            db.commit()
+            for user_id in expected:
+                invalidate_cached_user(user_id)
+        return mismatches
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Verify denormalized friend and event counters on users")
+    parser.add_argument("--fix", action="store_true", help="write the recomputed values back")
+    args = parser.parse_args()
+
+    mismatches = reconcile(args.fix)
+    if mismatches == 0:
+        print("All user counters are consistent.")
+    elif args.fix:
+        print(f"Fixed counters for {mismatches} user(s).")
+    else:
+        print(f"{mismatches} user(s) have drifted counters; rerun with --fix to repair.")
+        sys.exit(1)
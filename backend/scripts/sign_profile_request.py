@@ -0,0 +1,28 @@
+import os
+import sys
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+os.environ.setdefault("SECRET_KEY", "unused-signing-key")
+os.environ.setdefault("DB_URL", "sqlite://")
+
+from middleware.profiling import PROFILING_SECRET, sign_request
+
+
+def main():
+    if len(sys.argv) != 3:
+        print("usage: sign_profile_request.py METHOD PATH")
+        sys.exit(1)
+    if not PROFILING_SECRET:
+        print("PROFILING_SECRET is not set")
+        sys.exit(1)
+
+    method, path = sys.argv[1], sys.argv[2]
+    print(f"X-Profile-Request: {sign_request(PROFILING_SECRET, method, path, int(time.time()))}")
+
+
+if __name__ == "__main__":
+    main()
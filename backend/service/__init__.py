@@ -1,11 +1,15 @@
 from service.user_service import UserService, FriendshipService
 from service.event_service import EventService
 from service.expense_service import ExpenseService
+from service.token_service import TokenService
+from service.sync_service import SyncService
 
 __all__ = [
     "UserService",
     "FriendshipService",
     "EventService",
-    "ExpenseService"
+    "ExpenseService",
+    "TokenService",
+    "SyncService"
 ]
 
@@ -2,22 +2,25 @@ from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 from repository.event_repository import EventRepository
 from repository.user_repository import UserRepository
+from repository.change_repository import EventChangeRepository
 from models.models import Event, User, EventStatus
-from schemas.event_schemas import EventCreate
+from schemas.event_schemas import EventCreate, EventCompactResponse
+from realtime import publish
 from datetime import datetime
+from typing import List, Optional
 
 
 class EventService:
     def __init__(self, db: Session):
         self.event_repo = EventRepository(db)
         self.user_repo = UserRepository(db)
+        self.change_repo = EventChangeRepository(db)
         self.db = db
 
     def create_event(self, event_data: EventCreate, creator_id: int) -> Event:
         participants = []
         if event_data.participant_ids:
-            participants = self.user_repo.get_all()
-            participants = [u for u in participants if u.id in event_data.participant_ids]
+            participants = self.user_repo.get_by_ids(event_data.participant_ids)
             if len(participants) != len(event_data.participant_ids):
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
@@ -34,6 +37,7 @@ class EventService:
             created_by=creator_id
         )
         event.participants = participants
+        self.user_repo.adjust_counters([u.id for u in participants], active_events_count=1)
         return self.event_repo.create(event)
 
     def get_event_by_id(self, event_id: int) -> Event:
@@ -48,12 +52,62 @@ class EventService:
     def get_all_events(self, skip: int = 0, limit: int = 100):
         return self.event_repo.get_all(skip, limit)
     
-    def get_user_events(self, user_id: int):
-        return self.event_repo.get_by_user(user_id)
+    def get_user_events(
+        self,
+        user_id: int,
+        status: Optional[EventStatus] = None,
+        skip: int = 0,
+        limit: int = 100,
+        compact: bool = False
+    ):
+        if compact:
+            return [
+                EventCompactResponse.model_validate(row)
+                for row in self.event_repo.get_compact_by_user(user_id, status, skip, limit)
+            ]
+        return self.event_repo.get_by_user(user_id, status, skip, limit)
+    
+    def normalize_events(self, events: List[Event]) -> dict:
+        users = {}
+        data = []
+        for event in events:
+            users[event.creator.id] = event.creator
+            for participant in event.participants:
+                users[participant.id] = participant
+            data.append({
+                "id": event.id,
+                "name": event.name,
+                "description": event.description,
+                "created_by": event.created_by,
+                "status": event.status.value,
+                "created_at": event.created_at,
+                "finished_at": event.finished_at,
+                "participant_ids": [participant.id for participant in event.participants]
+            })
+        return {"data": data, "included": {"users": users}}
     
     def get_user_active_events(self, user_id: int, skip: int = 0, limit: int = 100):
         return self.event_repo.get_by_user_active(user_id, skip, limit)
 
+    def get_user_event_summaries(
+        self,
+        user_id: int,
+        status: Optional[EventStatus] = None,
+        skip: int = 0,
+        limit: int = 100
+    ):
+        return [
+            {
+                "id": row.id,
+                "name": row.name,
+                "status": row.status.value,
+                "participant_count": row.participant_count,
+                "total_spent": round(row.total_spent, 2),
+                "net_balance": round(row.net_balance, 2)
+            }
+            for row in self.event_repo.get_summaries_by_user(user_id, status, skip, limit)
+        ]
+
     def add_participant(self, event_id: int, user_id: int, moderator_id: int) -> Event:
         event = self.get_event_by_id(event_id)
         
@@ -73,13 +127,67 @@ class EventService:
                 detail="User not found"
             )
         
-        if user in event.participants:
+        if not self.event_repo.add_participants(event, [user.id]):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="User is already a participant"
             )
         
-        self.event_repo.add_participant(event, user)
+        self.user_repo.adjust_counters([user.id], active_events_count=1)
+        seq = self.change_repo.record(event.id, "participant", user.id, "add")
+        self.event_repo.save_participants(event)
+        publish(event.id, "participants.changed", seq=seq, added=[user.id], removed=[])
+        return event
+
+    def add_participants(self, event_id: int, user_ids: List[int], moderator_id: int) -> Event:
+        event = self.get_event_by_id(event_id)
+        
+        if not self.is_moderator(event, moderator_id):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Only event moderator can add participants"
+            )
+        
+        self.check_event_active(event)
+        
+        requested_ids = set(user_ids)
+        if len(self.user_repo.get_by_ids(list(requested_ids))) != len(requested_ids):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="One or more users not found"
+            )
+        
+        new_ids = self.event_repo.add_participants(event, requested_ids)
+        self.user_repo.adjust_counters(new_ids, active_events_count=1)
+        seq = self.change_repo.record_many(event.id, "participant", new_ids, "add")
+        self.event_repo.save_participants(event)
+        if new_ids:
+            publish(event.id, "participants.changed", seq=seq, added=new_ids, removed=[])
+        return event
+
+    def remove_participants(self, event_id: int, user_ids: List[int], moderator_id: int) -> Event:
+        event = self.get_event_by_id(event_id)
+        
+        if not self.is_moderator(event, moderator_id):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Only event moderator can remove participants"
+            )
+        
+        self.check_event_active(event)
+        
+        if event.created_by in user_ids:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cannot remove event creator"
+            )
+        
+        removed_ids = self.event_repo.remove_participants(event, user_ids)
+        self.user_repo.adjust_counters(removed_ids, active_events_count=-1)
+        seq = self.change_repo.record_many(event.id, "participant", removed_ids, "remove")
+        self.event_repo.save_participants(event)
+        if removed_ids:
+            publish(event.id, "participants.changed", seq=seq, added=[], removed=removed_ids)
         return event
 
     def remove_participant(self, event_id: int, user_id: int, moderator_id: int) -> Event:
@@ -107,7 +215,11 @@ class EventService:
                 detail="Cannot remove event creator"
             )
         
-        self.event_repo.remove_participant(event, user)
+        if self.event_repo.remove_participants(event, [user.id]):
+            self.user_repo.adjust_counters([user.id], active_events_count=-1)
+            seq = self.change_repo.record(event.id, "participant", user.id, "remove")
+            self.event_repo.save_participants(event)
+            publish(event.id, "participants.changed", seq=seq, added=[], removed=[user.id])
         return event
 
     def is_moderator(self, event: Event, user_id: int) -> bool:
@@ -130,7 +242,26 @@ class EventService:
         
         event.status = EventStatus.FINISHED
         event.finished_at = datetime.utcnow()
-        return self.event_repo.update(event)
+        self.user_repo.adjust_counters(
+            [u.id for u in event.participants],
+            active_events_count=-1,
+            finished_events_count=1
+        )
+        seq = self.change_repo.record(event.id, "event", event.id, "finish")
+        event = self.event_repo.update(event)
+        publish(event.id, "event.finished", seq=seq, finished_at=event.finished_at.isoformat())
+        return event
+
+    def check_participant(self, event_id: int, user_id: int) -> Event:
+        event = self.get_event_by_id(event_id)
+        
+        if not self.event_repo.is_participant(event.id, user_id):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Only event participants can follow event updates"
+            )
+        
+        return event
 
     def check_event_active(self, event: Event):
         if event.status == EventStatus.FINISHED:
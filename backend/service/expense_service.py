@@ -3,9 +3,11 @@ from fastapi import HTTPException, status
 from repository.expense_repository import ExpenseRepository, ExpenseParticipantRepository
 from repository.event_repository import EventRepository
 from repository.user_repository import UserRepository
+from repository.change_repository import EventChangeRepository
 from service.event_service import EventService
 from models.models import Expense, ExpenseParticipant, EventStatus
 from schemas.expense_schemas import ExpenseCreate, BalanceEntry, ExpenseUpdate
+from realtime import publish
 from collections import defaultdict
 
 
@@ -15,6 +17,7 @@ class ExpenseService:
         self.participant_repo = ExpenseParticipantRepository(db)
         self.event_repo = EventRepository(db)
         self.user_repo = UserRepository(db)
+        self.change_repo = EventChangeRepository(db)
         self.event_service = EventService(db)
         self.db = db
 
@@ -28,18 +31,9 @@ class ExpenseService:
         
         self.event_service.check_event_active(event)
         
-        payer = self.user_repo.get_by_id(expense_data.payer_id)
-        if not payer:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Payer not found"
-            )
-        
-        if payer not in event.participants:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Payer must be an event participant"
-            )
+        participant_ids = [p.user_id for p in expense_data.participants]
+        member_ids = self.event_repo.participants_among(event.id, [expense_data.payer_id, *participant_ids])
+        self.check_payer(expense_data.payer_id, member_ids)
         
         total_participant_amount = sum(p.amount for p in expense_data.participants)
         if abs(total_participant_amount - expense_data.amount) > 0.01:
@@ -48,35 +42,59 @@ class ExpenseService:
                 detail=f"Sum of participant amounts ({total_participant_amount}) must equal expense amount ({expense_data.amount})"
             )
         
-        participant_ids = [p.user_id for p in expense_data.participants]
-        participants = [u for u in event.participants if u.id in participant_ids]
-        if len(participants) != len(participant_ids):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="One or more participants are not event participants"
-            )
+        self.check_split_participants(participant_ids, member_ids)
         
         expense = Expense(
             event_id=expense_data.event_id,
             payer_id=expense_data.payer_id,
             amount=expense_data.amount,
-            description=expense_data.description
+            description=expense_data.description,
+            participants=[
+                ExpenseParticipant(user_id=p.user_id, amount=p.amount)
+                for p in expense_data.participants
+            ]
         )
-        expense = self.expense_repo.create(expense)
-        
-        expense_participants = [
-            ExpenseParticipant(
-                expense_id=expense.id,
-                user_id=p.user_id,
-                amount=p.amount
-            )
-            for p in expense_data.participants
-        ]
-        self.participant_repo.create_many(expense_participants)
+        self.expense_repo.add(expense)
+        seq = self.change_repo.record(event.id, "expense", expense.id, "upsert")
+        self.db.commit()
         
         self.db.refresh(expense)
+        self.publish_expense_change("expense.created", expense, seq)
         return expense
 
+    def publish_expense_change(self, change_type: str, expense: Expense, seq: int):
+        publish(
+            expense.event_id,
+            change_type,
+            seq=seq,
+            expense_id=expense.id,
+            payer_id=expense.payer_id,
+            amount=expense.amount
+        )
+        publish(expense.event_id, "balance.changed", seq=seq)
+
+    def check_payer(self, payer_id: int, member_ids: set):
+        if payer_id in member_ids:
+            return
+        
+        if not self.user_repo.get_by_id(payer_id):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Payer not found"
+            )
+        
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Payer must be an event participant"
+        )
+
+    def check_split_participants(self, participant_ids: list, member_ids: set):
+        if len(set(participant_ids)) != len(participant_ids) or not member_ids.issuperset(participant_ids):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="One or more participants are not event participants"
+            )
+
     def get_expense_by_id(self, expense_id: int) -> Expense:
         expense = self.expense_repo.get_by_id(expense_id)
         if not expense:
@@ -93,7 +111,15 @@ class ExpenseService:
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Event not found"
             )
-        return self.expense_repo.get_by_event(event_id)
+        return self.expense_repo.get_by_event_with_details(event_id)
+
+    def normalize_expenses(self, expenses: list) -> dict:
+        users = {}
+        for expense in expenses:
+            users[expense.payer_id] = expense.payer
+            for participant in expense.participants:
+                users[participant.user_id] = participant.user
+        return {"data": expenses, "included": {"users": users}}
 
     def delete_expense(self, expense_id: int, user_id: int):
         expense = self.get_expense_by_id(expense_id)
@@ -107,7 +133,11 @@ class ExpenseService:
         
         self.event_service.check_event_active(event)
         
+        event_id, deleted_id = expense.event_id, expense.id
+        seq = self.change_repo.record(event_id, "expense", deleted_id, "delete")
         self.expense_repo.delete(expense)
+        publish(event_id, "expense.deleted", seq=seq, expense_id=deleted_id)
+        publish(event_id, "balance.changed", seq=seq)
         return {"message": "Expense deleted successfully"}
 
     def update_expense(self, expense_id: int, expense_data: ExpenseUpdate, user_id: int) -> Expense:
@@ -133,48 +163,31 @@ class ExpenseService:
                 )
             
             participant_ids = [p.user_id for p in expense_data.participants]
-            participants = [u for u in event.participants if u.id in participant_ids]
-            if len(participants) != len(participant_ids):
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="One or more participants are not event participants"
-                )
+            self.check_split_participants(
+                participant_ids,
+                self.event_repo.participants_among(event.id, participant_ids)
+            )
+        
+        if expense_data.payer_id is not None:
+            self.check_payer(
+                expense_data.payer_id,
+                self.event_repo.participants_among(event.id, [expense_data.payer_id])
+            )
+            expense.payer_id = expense_data.payer_id
         
         expense.amount = new_amount
         if expense_data.description is not None:
             expense.description = expense_data.description
         
         if expense_data.participants:
-            for participant in expense.participants:
-                self.db.delete(participant)
-            self.db.flush()
-            
-            expense_participants = [
-                ExpenseParticipant(
-                    expense_id=expense.id,
-                    user_id=p.user_id,
-                    amount=p.amount
-                )
+            expense.participants = [
+                ExpenseParticipant(user_id=p.user_id, amount=p.amount)
                 for p in expense_data.participants
             ]
-            self.participant_repo.create_many(expense_participants)
-        
-        if expense_data.payer_id is not None:
-            payer = self.user_repo.get_by_id(expense_data.payer_id)
-            if not payer:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="Payer not found"
-                )
-            if payer not in event.participants:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Payer must be an event participant"
-                )
-            expense.payer_id = expense_data.payer_id
         
+        seq = self.change_repo.record(event.id, "expense", expense.id, "upsert")
         self.expense_repo.update(expense)
-        self.db.refresh(expense)
+        self.publish_expense_change("expense.updated", expense, seq)
         return expense
 
     def calculate_balance(self, event_id: int):
@@ -0,0 +1,59 @@
+from sqlalchemy.orm import Session
+from fastapi import HTTPException, status
+from repository.change_repository import EventChangeRepository
+from repository.expense_repository import ExpenseRepository
+from repository.user_repository import UserRepository
+from service.event_service import EventService
+from schemas.sync_schemas import EventChanges
+
+SYNC_MAX_CHANGES = 1000
+
+
+class SyncService:
+    def __init__(self, db: Session):
+        self.change_repo = EventChangeRepository(db)
+        self.expense_repo = ExpenseRepository(db)
+        self.user_repo = UserRepository(db)
+        self.event_service = EventService(db)
+        self.db = db
+
+    def get_event_changes(self, event_id: int, user_id: int, since: int = 0, limit: int = SYNC_MAX_CHANGES) -> EventChanges:
+        event = self.event_service.check_participant(event_id, user_id)
+        
+        if since < 0 or since > event.change_seq:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Unknown change cursor"
+            )
+        
+        if since == 0:
+            # A fresh client gets a snapshot rather than a replay, which also covers rows older than the log.
+            return EventChanges(
+                event_id=event.id,
+                cursor=event.change_seq,
+                has_more=False,
+                status=event.status.value,
+                expenses=self.expense_repo.get_by_event_with_details(event.id),
+                added_participants=event.participants
+            )
+        
+        limit = max(1, min(limit, SYNC_MAX_CHANGES))
+        changes = self.change_repo.get_since(event.id, since, limit + 1)
+        has_more = len(changes) > limit
+        changes = changes[:limit]
+        
+        # Only the latest operation per entity matters to the client.
+        latest = {(change.entity, change.entity_id): change.op for change in changes}
+        upserted_ids = [eid for (entity, eid), op in latest.items() if entity == "expense" and op == "upsert"]
+        added_ids = [eid for (entity, eid), op in latest.items() if entity == "participant" and op == "add"]
+        
+        return EventChanges(
+            event_id=event.id,
+            cursor=changes[-1].seq if changes else since,
+            has_more=has_more,
+            status=event.status.value,
+            expenses=self.expense_repo.get_by_ids_with_details(upserted_ids),
+            deleted_expense_ids=sorted(eid for (entity, eid), op in latest.items() if entity == "expense" and op == "delete"),
+            added_participants=self.user_repo.get_by_ids(added_ids),
+            removed_participant_ids=sorted(eid for (entity, eid), op in latest.items() if entity == "participant" and op == "remove")
+        )
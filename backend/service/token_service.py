@@ -0,0 +1,80 @@
+from sqlalchemy.orm import Session
+from fastapi import HTTPException, status
+from repository.token_repository import RefreshTokenRepository
+from repository.user_repository import UserRepository
+from models.models import User, RefreshToken
+from auth.jwt_handler import (
+    create_access_token, create_refresh_token, decode_refresh_token,
+    generate_token_id, invalidate_access_tokens_for_family, invalidate_access_tokens_for_user,
+    REFRESH_TOKEN_EXPIRE_DAYS
+)
+from auth.revocation import revoked_families
+from datetime import datetime, timedelta
+from typing import Optional
+
+
+class TokenService:
+    def __init__(self, db: Session):
+        self.token_repo = RefreshTokenRepository(db)
+        self.user_repo = UserRepository(db)
+        self.db = db
+
+    def issue_tokens(self, user: User, family_id: Optional[str] = None) -> tuple[str, str]:
+        family_id = family_id or generate_token_id()
+        jti = generate_token_id()
+        self.token_repo.create(RefreshToken(
+            jti=jti,
+            family_id=family_id,
+            user_id=user.id,
+            expires_at=datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+        ))
+        access_token = create_access_token(data={"sub": user.id, "fam": family_id})
+        refresh_token = create_refresh_token(data={"sub": user.id, "fam": family_id, "jti": jti})
+        return access_token, refresh_token
+
+    def rotate(self, refresh_token: str) -> tuple[User, str, str]:
+        invalid_token = HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired refresh token"
+        )
+
+        payload = decode_refresh_token(refresh_token)
+        if payload is None or not payload.get("jti"):
+            raise invalid_token
+
+        stored = self.token_repo.get_by_jti(payload["jti"])
+        if stored is None or revoked_families.is_revoked(stored.family_id):
+            raise invalid_token
+
+        family_id, user_id = stored.family_id, stored.user_id
+        if not self.token_repo.mark_used(stored.jti, datetime.utcnow()):
+            # A refresh token presented twice means it leaked: retire the whole family.
+            self.revoke_family(family_id)
+            raise invalid_token
+
+        user = self.user_repo.get_by_id(user_id)
+        if user is None:
+            raise invalid_token
+
+        if not user.is_active:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="User is inactive"
+            )
+
+        access_token, new_refresh_token = self.issue_tokens(user, family_id)
+        return user, access_token, new_refresh_token
+
+    def revoke_family(self, family_id: str):
+        self.token_repo.revoke_family(family_id, datetime.utcnow())
+        revoked_families.add(family_id)
+        invalidate_access_tokens_for_family(family_id)
+
+    def revoke_user_sessions(self, user_id: int, keep_family_id: Optional[str] = None):
+        """Sign the user out everywhere except keep_family_id, e.g. after a password change"""
+        for family_id in self.token_repo.revoke_user_families(user_id, datetime.utcnow(), keep_family_id):
+            revoked_families.add(family_id)
+        invalidate_access_tokens_for_user(user_id)
+
+    def load_revocation_filter(self):
+        revoked_families.rebuild(self.token_repo.get_revoked_family_ids(datetime.utcnow()))
@@ -1,8 +1,12 @@
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 from repository.user_repository import UserRepository, FriendshipRepository
+from repository.friends_graph import FriendsGraph, invalidate_adjacency
 from models.models import User, Friendship, FriendshipStatus
-from auth.jwt_handler import get_password_hash, verify_password, create_access_token, create_refresh_token, generate_reset_token
+from auth.jwt_handler import create_access_token, generate_reset_token, hash_reset_token
+from service.token_service import TokenService
+from auth.kdf_pool import hash_password_offloaded, verify_password_offloaded
 from schemas.user_schemas import UserCreate, UserUpdate, PasswordChange
 from datetime import datetime, timedelta
 
@@ -26,7 +30,7 @@ class UserService:
                 detail="Email already registered"
             )
         
-        hashed_password = get_password_hash(user_data.password)
+        hashed_password = hash_password_offloaded(user_data.password)
         
         db_user = User(
             username=user_data.username,
@@ -43,7 +47,7 @@ class UserService:
                 detail="Incorrect username or password"
             )
         
-        if not verify_password(password, user.hashed_password):
+        if not verify_password_offloaded(password, user.hashed_password):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Incorrect username or password"
@@ -62,13 +66,11 @@ class UserService:
         return access_token
     
     def get_refresh_token(self, user: User) -> str:
-        refresh_token = create_refresh_token(data={"sub": user.id})
+        _, refresh_token = self.get_tokens(user)
         return refresh_token
     
     def get_tokens(self, user: User) -> tuple[str, str]:
-        access_token = create_access_token(data={"sub": user.id})
-        refresh_token = create_refresh_token(data={"sub": user.id})
-        return access_token, refresh_token
+        return TokenService(self.db).issue_tokens(user)
 
     def update_user(self, user: User, user_data: UserUpdate) -> User:
         if user_data.username and user_data.username != user.username:
@@ -90,13 +92,13 @@ class UserService:
         return self.user_repo.update(user)
 
     def change_password(self, user: User, password_data: PasswordChange) -> User:
-        if not verify_password(password_data.current_password, user.hashed_password):
+        if not verify_password_offloaded(password_data.current_password, user.hashed_password):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Current password is incorrect"
             )
         
-        user.hashed_password = get_password_hash(password_data.new_password)
+        user.hashed_password = hash_password_offloaded(password_data.new_password)
         return self.user_repo.update(user)
 
     def request_password_reset(self, email: str) -> str:
@@ -105,14 +107,14 @@ class UserService:
             return ""
         
         reset_token = generate_reset_token()
-        user.reset_token = reset_token
+        user.reset_token_hash = hash_reset_token(reset_token)
         user.reset_token_expires = datetime.utcnow() + timedelta(hours=1)
         self.user_repo.update(user)
         
         return reset_token
 
     def reset_password(self, token: str, new_password: str) -> User:
-        user = self.user_repo.get_by_reset_token(token)
+        user = self.user_repo.get_by_reset_token_hash(hash_reset_token(token))
         
         if not user:
             raise HTTPException(
@@ -126,11 +128,14 @@ class UserService:
                 detail="Reset token has expired"
             )
         
-        user.hashed_password = get_password_hash(new_password)
-        user.reset_token = None
+        user.hashed_password = hash_password_offloaded(new_password)
+        user.reset_token_hash = None
         user.reset_token_expires = None
         return self.user_repo.update(user)
 
+    def purge_expired_reset_tokens(self) -> int:
+        return self.user_repo.clear_expired_reset_tokens(datetime.utcnow())
+
     def get_user_by_id(self, user_id: int) -> User:
         user = self.user_repo.get_by_id(user_id)
         if not user:
@@ -146,24 +151,16 @@ class UserService:
     def search_users(self, query: str, skip: int = 0, limit: int = 20):
         return self.user_repo.search_by_username(query, skip, limit)
     
-    def get_user_profile_with_friends_count(self, user_id: int) -> dict:
-        """Get user profile with friends count"""
-        user = self.get_user_by_id(user_id)
-        friends_count = self.friendship_repo.count_friends(user_id)
-        return {
-            "id": user.id,
-            "username": user.username,
-            "email": user.email,
-            "is_active": user.is_active,
-            "created_at": user.created_at,
-            "friends_count": friends_count
-        }
+    def get_user_profile_with_friends_count(self, user_id: int) -> User:
+        """Get user profile; friend and event counters are maintained on the users row"""
+        return self.get_user_by_id(user_id)
 
 
 class FriendshipService:
     def __init__(self, db: Session):
         self.user_repo = UserRepository(db)
         self.friendship_repo = FriendshipRepository(db)
+        self.friends_graph = FriendsGraph(db)
         self.db = db
 
     def send_friend_request(self, user_id: int, friend_id: int) -> Friendship:
@@ -201,10 +198,17 @@ class FriendshipService:
             friend_id=friend_id,
             status=FriendshipStatus.PENDING
         )
-        return self.friendship_repo.create(friendship)
+        try:
+            return self.friendship_repo.create(friendship)
+        except IntegrityError:
+            self.db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Friend request already pending"
+            )
 
     def accept_friend_request(self, user_id: int, friendship_id: int) -> Friendship:
-        friendship = self.db.query(Friendship).filter(Friendship.id == friendship_id).first()
+        friendship = self.friendship_repo.get_by_id(friendship_id)
         
         if not friendship:
             raise HTTPException(
@@ -225,10 +229,13 @@ class FriendshipService:
             )
         
         friendship.status = FriendshipStatus.ACCEPTED
-        return self.friendship_repo.update(friendship)
+        self.user_repo.adjust_counters([friendship.user_id, friendship.friend_id], friends_count=1)
+        friendship = self.friendship_repo.update(friendship)
+        invalidate_adjacency(friendship.user_id, friendship.friend_id)
+        return friendship
 
     def reject_friend_request(self, user_id: int, friendship_id: int) -> Friendship:
-        friendship = self.db.query(Friendship).filter(Friendship.id == friendship_id).first()
+        friendship = self.friendship_repo.get_by_id(friendship_id)
         
         if not friendship:
             raise HTTPException(
@@ -249,24 +256,74 @@ class FriendshipService:
             )
         
         friendship.status = FriendshipStatus.REJECTED
-        return self.friendship_repo.update(friendship)
+        friendship = self.friendship_repo.update(friendship)
+        invalidate_adjacency(friendship.user_id, friendship.friend_id)
+        return friendship
 
     def get_pending_requests(self, user_id: int):
-        return self.friendship_repo.get_pending_requests(user_id)
+        return self.friends_graph.get_pending_requests(user_id)
     
     def get_sent_requests(self, user_id: int):
-        return self.friendship_repo.get_sent_requests(user_id)
+        return self.friends_graph.get_sent_requests(user_id)
 
     def get_friends(self, user_id: int):
-        friendships = self.friendship_repo.get_friendships_by_user(
-            user_id, 
-            FriendshipStatus.ACCEPTED
-        )
-        return friendships
+        return self.friends_graph.get_friends(user_id)
+
+    def describe_friendship(self, user_id: int, friendship) -> dict:
+        if not friendship:
+            return {"status": "none"}
+        
+        return {
+            "status": friendship.status.value,
+            "friendship_id": friendship.id,
+            "is_sender": friendship.user_id == user_id
+        }
+
+    def get_friendship_status(self, user_id: int, other_id: int) -> dict:
+        return self.describe_friendship(user_id, self.friendship_repo.get_by_ids(user_id, other_id))
+
+    def get_friendship_statuses(self, user_id: int, other_ids: list) -> dict:
+        """Friendship status towards each of other_ids, answered by a single IN query"""
+        by_counterpart = {
+            friendship.high_id if friendship.low_id == user_id else friendship.low_id: friendship
+            for friendship in self.friendship_repo.get_with_counterparts(user_id, list(set(other_ids)))
+        }
+        return {
+            other_id: self.describe_friendship(user_id, by_counterpart.get(other_id))
+            for other_id in other_ids
+        }
+
+    def get_suggestions(self, user_id: int, limit: int = 20):
+        return [
+            {"user": user, "mutual_friends": mutual_friends, "shared_events": shared_events}
+            for user, mutual_friends, shared_events in self.friends_graph.get_suggestions(user_id, limit)
+        ]
+
+    def get_mutual_friends(self, user_id: int, other_id: int, limit: int = 100) -> dict:
+        if other_id == user_id:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cannot get mutual friends with yourself"
+            )
+        
+        if not self.user_repo.get_by_id(other_id):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found"
+            )
+        
+        mutual_ids = self.friends_graph.get_mutual_friend_ids(user_id, other_id)
+        friends = self.db.query(User).filter(
+            User.id.in_(mutual_ids)
+        ).order_by(User.id).limit(limit).all() if mutual_ids else []
+        return {
+            "user_id": other_id,
+            "count": len(mutual_ids),
+            "friends": friends
+        }
 
     def remove_friend(self, user_id: int, friendship_id: int):
-        friendship = self.friendship_repo.get_friendships_by_user(user_id)
-        friendship = next((f for f in friendship if f.id == friendship_id), None)
+        friendship = self.friendship_repo.get_by_id_for_user(friendship_id, user_id)
         
         if not friendship:
             raise HTTPException(
@@ -274,5 +331,9 @@ class FriendshipService:
                 detail="Friendship not found"
             )
         
+        pair = (friendship.user_id, friendship.friend_id)
+        if friendship.status == FriendshipStatus.ACCEPTED:
+            self.user_repo.adjust_counters(list(pair), friends_count=-1)
         self.friendship_repo.delete(friendship)
+        invalidate_adjacency(*pair)
         return {"message": "Friendship removed"}